@@ -0,0 +1,355 @@
+"""
+Backend query checks.
+
+    python -m app.bench explain --seed 1000000
+    python -m app.bench geojson --count 10 100 1000
+    python -m app.bench load --concurrency 10 50 200
+
+``explain`` runs EXPLAIN on the earthquake, flood and wildfire list queries
+with a bounding box, a radius and a polygon filter, and exits non-zero
+unless every plan reads a spatial GiST index. ``--seed N`` first tops each
+table up with N synthetic rows (source ``BENCH``) so the plans are those of
+a large table; ``--cleanup`` deletes them again. Run it against a scratch
+database.
+
+``geojson`` times the list endpoints' response bodies built both ways: the
+rows converted by the schemas' ``from_data`` and serialized in Python, and
+the JSON rendered by PostgreSQL (``render_*``). It reports the best of
+``--repeat`` runs per page size and level of detail.
+
+``load`` compares the list endpoints' sync and async database paths under
+concurrent clients, the way FastAPI runs them: ``render_*`` on the sync
+engine through the threadpool (40 threads unless ``--threads`` says
+otherwise) and ``render_*_async`` on the asyncpg engine in the event loop.
+It reports requests/sec, latency percentiles and errors per concurrency
+level. HTTP is left out so that only the database path differs.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from anyio.to_thread import current_default_thread_limiter
+from fastapi.encoders import jsonable_encoder
+from starlette.concurrency import run_in_threadpool
+
+from . import AsyncSessionLocal, SessionLocal, async_engine
+from .controllers.earthquakes import (earthquake_filters, read_earthquakes, render_earthquakes,
+                                      render_earthquakes_async)
+from .controllers.floods import flood_filters, read_floods, render_floods, render_floods_async
+from .controllers.wildfire import (read_wildfires, render_wildfires, render_wildfires_async,
+                                   wildfire_filters)
+from .models import Earthquake, Flood, Wildfire
+
+TABLES = {
+    "earthquakes": (Earthquake, earthquake_filters),
+    "floods": (Flood, flood_filters),
+    "wildfires": (Wildfire, wildfire_filters),
+}
+
+# Small areas around northern Pakistan, so the spatial filter is selective.
+CASES = {
+    "bbox": dict(min_lat=33.0, max_lat=35.0, min_lon=72.0, max_lon=74.0),
+    "radius": dict(lat=33.7, lon=73.0, radius_km=50),
+    "polygon": dict(polygon="POLYGON((72 33, 74 33, 73 35, 72 33))"),
+}
+
+SEED_POINTS = """
+    SELECT i, ST_SetSRID(ST_MakePoint(random() * 360 - 180, random() * 180 - 90), 4326) AS p,
+           timezone('UTC', now()) - random() * interval '3650 days' AS reported_at
+    FROM generate_series(1, :rows) AS i
+"""
+
+SEED = {
+    "earthquakes": f"""
+        INSERT INTO earthquakes (earthquake_id, usgs_id, magnitude, depth_km, epicenter,
+                                 reported_at, source, title)
+        SELECT gen_random_uuid(), 'bench-' || i, random() * 7, random() * 100, p,
+               reported_at, 'BENCH', 'bench'
+        FROM ({SEED_POINTS}) AS points
+        ON CONFLICT (usgs_id) DO NOTHING
+    """,
+    **{table: f"""
+        INSERT INTO {table} ({id_column}, gdacs_id, severity_level, epicenter, affected_area,
+                             reported_at, source, title)
+        SELECT gen_random_uuid(), 'bench-' || i, 'MINOR'::severityenum, p, ST_Multi(ST_Expand(p, 0.1)),
+               reported_at, 'BENCH', 'bench'
+        FROM ({SEED_POINTS}) AS points
+        ON CONFLICT (gdacs_id) DO NOTHING
+    """ for table, id_column in (("floods", "flood_id"), ("wildfires", "wildfire_id"))},
+}
+
+# Python and database paths of each list endpoint; the flood and wildfire
+# ones also take ``lod``.
+RENDERERS = {
+    "earthquakes": (read_earthquakes, render_earthquakes, False),
+    "floods": (read_floods, render_floods, True),
+    "wildfires": (read_wildfires, render_wildfires, True),
+}
+
+# Sync and async database paths of each list endpoint.
+LOAD_PATHS = {
+    "earthquakes": (render_earthquakes, render_earthquakes_async),
+    "floods": (render_floods, render_floods_async),
+    "wildfires": (render_wildfires, render_wildfires_async),
+}
+
+INDEX_SCANS = ("Index Scan", "Index Only Scan", "Bitmap Index Scan")
+
+
+class Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement, analyze=False):
+        self.statement = statement
+        self.analyze = analyze
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    options = "ANALYZE, FORMAT JSON" if element.analyze else "FORMAT JSON"
+    return f"EXPLAIN ({options}) " + compiler.process(element.statement, **kw)
+
+
+def plan_indexes(plan):
+    """Names of the indexes scanned anywhere in a JSON plan node."""
+    names = []
+    if plan.get("Node Type") in INDEX_SCANS:
+        names.append(plan.get("Index Name"))
+    for child in plan.get("Plans", []):
+        names.extend(plan_indexes(child))
+    return names
+
+
+def seed(session, rows):
+    for table, statement in SEED.items():
+        session.execute(text(statement), {"rows": rows})
+        session.commit()
+        session.execute(text(f"ANALYZE {table}"))
+        session.commit()
+        print(f"Seeded {table} with up to {rows} BENCH rows.")
+
+
+def cleanup(session):
+    for table in SEED:
+        session.execute(text(f"DELETE FROM {table} WHERE source = 'BENCH'"))
+    session.commit()
+
+
+def explain(session, analyze=False):
+    results = []
+    for table, (model, filters) in TABLES.items():
+        spatial_indexes = {f"idx_{table}_epicenter", f"idx_{table}_epicenter_geography"}
+        for case, params in CASES.items():
+            id_column = model.__mapper__.primary_key[0]
+            statement = (select(model).where(*filters(**params))
+                         .order_by(model.reported_at.desc(), id_column.desc()).limit(10))
+            output = session.execute(Explain(statement, analyze)).scalar()
+            if isinstance(output, str):
+                output = json.loads(output)
+            plan = output[0]
+            indexes = plan_indexes(plan["Plan"])
+            results.append({
+                "table": table,
+                "filter": case,
+                "indexes": ",".join(name for name in indexes if name) or "-",
+                "ms": plan.get("Execution Time", "-"),
+                "ok": bool(spatial_indexes & set(indexes)),
+            })
+    return results
+
+
+def python_body(read, db, **params):
+    """The body the list routes returned before rendering moved to PostgreSQL."""
+    items, _ = read(db, **params)
+    return json.dumps(jsonable_encoder(items)).encode()
+
+
+def database_body(render, db, **params):
+    body, _ = render(db, **params)
+    return body
+
+
+def best_time(function, repeat):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def geojson(session, counts, repeat=3):
+    results = []
+    for table, (read, render, has_lod) in RENDERERS.items():
+        for lod in ("full", "medium", "low") if has_lod else ("-",):
+            for count in counts:
+                params = {"count": count, **({"lod": lod} if has_lod else {})}
+                python_s, python_bytes = best_time(
+                    lambda: python_body(read, session, **params), repeat)
+                database_s, database_bytes = best_time(
+                    lambda: database_body(render, session, **params), repeat)
+                results.append({
+                    "table": table,
+                    "lod": lod,
+                    "count": count,
+                    "features": len(json.loads(database_bytes)),
+                    "python_ms": round(python_s * 1000.0, 1),
+                    "database_ms": round(database_s * 1000.0, 1),
+                    "speedup": round(python_s / max(database_s, 1e-9), 1),
+                    "python_kb": round(len(python_bytes) / 1024.0, 1),
+                    "database_kb": round(len(database_bytes) / 1024.0, 1),
+                })
+    return results
+
+
+def sync_request(render, params):
+    session = SessionLocal()
+    try:
+        return render(session, **params)
+    finally:
+        session.close()
+
+
+async def async_request(render, params):
+    async with AsyncSessionLocal() as session:
+        return await render(session, **params)
+
+
+async def run_clients(call, concurrency, requests):
+    """``concurrency`` clients sharing ``requests`` calls; returns latencies, errors and wall time."""
+    latencies, errors = [], 0
+    remaining = iter(range(requests))
+
+    async def client():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                await call()
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+async def load(table, concurrencies, requests, count, threads):
+    current_default_thread_limiter().total_tokens = threads
+    render_sync, render_async = LOAD_PATHS[table]
+    params = {"count": count}
+    modes = {
+        "sync": lambda: run_in_threadpool(sync_request, render_sync, params),
+        "async": lambda: async_request(render_async, params),
+    }
+    results = []
+    try:
+        for concurrency in concurrencies:
+            for mode, call in modes.items():
+                latencies, errors, elapsed = await run_clients(call, concurrency, requests)
+                cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [0.0] * 99
+                results.append({
+                    "mode": mode,
+                    "concurrency": concurrency,
+                    "requests": requests,
+                    "errors": errors,
+                    "req_per_sec": round(len(latencies) / elapsed, 1),
+                    "p50_ms": round(cuts[49] * 1000.0, 1),
+                    "p95_ms": round(cuts[94] * 1000.0, 1),
+                    "p99_ms": round(cuts[98] * 1000.0, 1),
+                    "ok": not errors,
+                })
+    finally:
+        await async_engine.dispose()
+    return results
+
+
+def print_table(results, columns, failure="(no spatial index)"):
+    rows = [[str(result[column]) for column in columns] for result in results]
+    widths = [max(len(column), *(len(row[i]) for row in rows))
+              for i, column in enumerate(columns)]
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    for row, result in zip(rows, results):
+        line = "  ".join(value.ljust(width) for value, width in zip(row, widths))
+        print(line if result.get("ok", True) else line + "  " + failure)
+
+
+def print_results(results):
+    print_table(results, ["table", "filter", "indexes", "ms"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.bench")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    explain_parser = commands.add_parser(
+        "explain", help="check that the list queries use the spatial indexes")
+    explain_parser.add_argument("--seed", type=int, default=0,
+                                help="top each table up with this many synthetic rows first")
+    explain_parser.add_argument("--analyze", action="store_true",
+                                help="run the queries (EXPLAIN ANALYZE) to time them")
+    explain_parser.add_argument("--cleanup", action="store_true",
+                                help="delete the synthetic rows afterwards")
+
+    geojson_parser = commands.add_parser(
+        "geojson", help="time the list bodies built in Python and in PostgreSQL")
+    geojson_parser.add_argument("--count", type=int, nargs="+", default=[10, 100, 1000],
+                                help="page sizes to time")
+    geojson_parser.add_argument("--repeat", type=int, default=3)
+
+    load_parser = commands.add_parser(
+        "load", help="compare the sync and async database paths under concurrent clients")
+    load_parser.add_argument("--table", choices=sorted(LOAD_PATHS), default="earthquakes")
+    load_parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 50, 200],
+                             help="numbers of concurrent clients to run")
+    load_parser.add_argument("--requests", type=int, default=1000,
+                             help="requests per concurrency level and path")
+    load_parser.add_argument("--count", type=int, default=100, help="page size")
+    load_parser.add_argument("--threads", type=int, default=40,
+                             help="threadpool size of the sync path")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "load":
+        results = asyncio.run(load(args.table, args.concurrency, args.requests,
+                                   args.count, args.threads))
+        print_table(results, ["mode", "concurrency", "requests", "errors", "req_per_sec",
+                              "p50_ms", "p95_ms", "p99_ms"], failure="(errors)")
+        return
+
+    if args.command == "geojson":
+        session = SessionLocal()
+        try:
+            results = geojson(session, args.count, args.repeat)
+        finally:
+            session.close()
+        print_table(results, ["table", "lod", "count", "features", "python_ms",
+                              "database_ms", "speedup", "python_kb", "database_kb"])
+        return
+
+    session = SessionLocal()
+    try:
+        if args.seed:
+            seed(session, args.seed)
+        results = explain(session, args.analyze)
+        if args.cleanup:
+            cleanup(session)
+    finally:
+        session.close()
+
+    print_results(results)
+    if not all(result["ok"] for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import os
+import time
+from collections import OrderedDict
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from starlette.responses import Response
+
+from .models import DataVersion
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# How long the data versions read from the database are trusted before they
+# are read again. Bounds both staleness and the queries cache hits cost.
+DATA_VERSION_TTL = float(os.getenv("DATA_VERSION_TTL", "1"))
+
+# GET paths whose responses are cached, with the tables they are built from.
+# Only responses built from these tables alone qualify: GET /report/ embeds
+# live GDACS alert data that no table version tracks.
+CACHED_PATHS = {
+    "/earthquakes/": ("earthquakes",),
+    "/floods/": ("floods",),
+    "/wildfire/": ("wildfires",),
+    "/report/latest": ("earthquakes", "floods", "wildfires"),
+}
+CACHED_PREFIXES = {
+    "/earthquakes/aftershocks/": ("earthquakes",),
+    "/earthquakes/getGDASCevent/": ("earthquakes",),
+}
+
+# Response headers that are replayed on a hit.
+CACHED_HEADERS = ("content-type", "x-next-cursor", "link")
+
+
+def cached_tables(path: str):
+    """The tables behind a cached path, or None when it is not cached."""
+    if path in CACHED_PATHS:
+        return CACHED_PATHS[path]
+    for prefix, tables in CACHED_PREFIXES.items():
+        if path.startswith(prefix):
+            return tables
+    return None
+
+
+def cache_key(request):
+    """
+    The path and its query parameters with empty values dropped and the rest
+    sorted, so that parameter order and ``?x=`` do not split the cache.
+    """
+    params = sorted((name, value) for name, value in request.query_params.multi_items()
+                    if value != "")
+    return request.headers.get("host"), request.url.path, tuple(params)
+
+
+async def read_data_versions(session_factory):
+    async with session_factory() as session:
+        result = await session.execute(select(DataVersion.table_name, DataVersion.version))
+        return dict(result.all())
+
+
+class ResponseCache:
+    """
+    LRU cache of GET response bodies, bounded by entry count and total bytes.
+    Each entry remembers the versions of its tables when it was built and is
+    dropped on lookup once any of them has moved on.
+    """
+
+    def __init__(self, max_entries=RESPONSE_CACHE_SIZE, max_bytes=RESPONSE_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def get(self, key, versions):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry[0] != versions:
+            self._remove(key)
+            self.invalidations += 1
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, versions, status_code, headers, body):
+        if key in self.entries:
+            self._remove(key)
+        if len(body) > self.max_bytes:
+            return
+        self.entries[key] = (versions, status_code, headers, body)
+        self.bytes += len(body)
+        while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+            self._remove(next(iter(self.entries)))
+            self.evictions += 1
+
+    def _remove(self, key):
+        _, _, _, body = self.entries.pop(key)
+        self.bytes -= len(body)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+            "invalidations": self.invalidations,
+            "evictions": self.evictions,
+        }
+
+
+class DataVersions:
+    """The ``data_versions`` table, re-read at most every ``ttl`` seconds."""
+
+    def __init__(self, session_factory, ttl=DATA_VERSION_TTL):
+        self.session_factory = session_factory
+        self.ttl = ttl
+        self.versions = {}
+        self.read_at = None
+
+    async def current(self, tables):
+        now = time.monotonic()
+        if self.read_at is None or now - self.read_at >= self.ttl:
+            self.versions = await read_data_versions(self.session_factory)
+            self.read_at = now
+        return tuple(self.versions.get(table, 0) for table in tables)
+
+
+response_cache = ResponseCache()
+
+
+def response_cache_middleware(session_factory, cache=response_cache):
+    """
+    HTTP middleware serving the ``CACHED_PATHS`` GETs from ``cache``. Only
+    200 responses are stored; the ``X-Cache`` header tells hits from misses.
+    """
+    data_versions = DataVersions(session_factory)
+
+    async def middleware(request, call_next):
+        tables = cached_tables(request.url.path) if request.method == "GET" else None
+        if tables is None:
+            return await call_next(request)
+
+        key = cache_key(request)
+        # Read before the response is built: if a write lands meanwhile, the
+        # entry is stored under the older version and is dropped next time.
+        try:
+            versions = await data_versions.current(tables)
+        except SQLAlchemyError as e:
+            print(f"Response cache bypassed, data versions unavailable: {e}")
+            return await call_next(request)
+        entry = cache.get(key, versions)
+        if entry is not None:
+            _, status_code, headers, body = entry
+            return Response(content=body, status_code=status_code,
+                            headers={**headers, "X-Cache": "HIT"})
+
+        response = await call_next(request)
+        if response.status_code != 200:
+            return response
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        headers = {name: response.headers[name] for name in CACHED_HEADERS
+                   if name in response.headers}
+        cache.put(key, versions, response.status_code, headers, body)
+        return Response(content=body, status_code=response.status_code,
+                        headers={**response.headers, "X-Cache": "MISS"})
+
+    return middleware
@@ -0,0 +1,34 @@
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import DeadLetter
+
+
+async def read_dead_letters(db: AsyncSession, source: Optional[str] = None, parked: Optional[bool] = None, include_payload: bool = False, count: int = 50):
+    query = select(DeadLetter)
+
+    if source:
+        query = query.where(DeadLetter.source == source)
+    if parked is True:
+        query = query.where(DeadLetter.next_attempt_at.is_(None))
+    elif parked is False:
+        query = query.where(DeadLetter.next_attempt_at.isnot(None))
+
+    result = await db.execute(query.order_by(DeadLetter.last_failed_at.desc()).limit(count))
+    letters = result.scalars().all()
+    return [
+        {
+            "source": letter.source,
+            "event_id": letter.event_id,
+            "error_class": letter.error_class,
+            "error_message": letter.error_message,
+            "attempts": letter.attempts,
+            "first_failed_at": letter.first_failed_at.isoformat(),
+            "last_failed_at": letter.last_failed_at.isoformat(),
+            "next_attempt_at": letter.next_attempt_at.isoformat() if letter.next_attempt_at else None,
+            **({"payload": letter.payload} if include_payload else {}),
+        }
+        for letter in letters
+    ]
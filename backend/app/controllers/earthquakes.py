@@ -1,15 +1,18 @@
 from typing import Optional
 from datetime import datetime
+from sqlalchemy import Text, cast, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from geoalchemy2.functions import ST_Y, ST_X
 
+from ..geojson import (build_feature, json_object, point_coordinates, render_features,
+                       render_features_async)
 from ..models import Earthquake
+from ..pagination import keyset_page
 from ..schemas import Earthquake as EarthquakeSchema
+from ..spatial import spatial_filters
 
 
-def read_earthquakes(
-    db: Session,
+def earthquake_filters(
     start_time: Optional[datetime] = None,
     end_time: Optional[datetime] = None,
     min_lat: Optional[float] = None,
@@ -20,30 +23,82 @@ def read_earthquakes(
     max_magnitude: Optional[float] = None,
     min_depth: Optional[float] = None,
     max_depth: Optional[float] = None,
-    count: Optional[int] = 10
+    lat: Optional[float] = None,
+    lon: Optional[float] = None,
+    radius_km: Optional[float] = None,
+    polygon: Optional[str] = None,
 ):
-    # Cast location from Geography to Geometry for coordinate extraction
-    location_geom = Earthquake.epicenter
-
-    # Query with bounding box and magnitude range filter
-    earthquakes = db.query(Earthquake).filter(
-        and_(
-            ST_Y(location_geom) >= min_lat if min_lat else True,
-            ST_Y(location_geom) <= max_lat if max_lat else True,
-            ST_X(location_geom) >= min_lon if min_lon else True,
-            ST_X(location_geom) <= max_lon if max_lon else True,
-            Earthquake.magnitude >= min_magnitude if min_magnitude else True,
-            Earthquake.magnitude <= max_magnitude if max_magnitude else True,
-            Earthquake.reported_at >= start_time if start_time else True,
-            Earthquake.reported_at <= end_time if end_time else True,
-            Earthquake.depth_km >= min_depth if min_depth else True,
-            Earthquake.depth_km <= max_depth if max_depth else True,
-        )
-    ).order_by(Earthquake.reported_at.desc()).limit(count).all()
+    filters = spatial_filters(Earthquake.epicenter, min_lat, max_lat, min_lon, max_lon,
+                              lat, lon, radius_km, polygon)
+    if min_magnitude is not None:
+        filters.append(Earthquake.magnitude >= min_magnitude)
+    if max_magnitude is not None:
+        filters.append(Earthquake.magnitude <= max_magnitude)
+    if start_time:
+        filters.append(Earthquake.reported_at >= start_time)
+    if end_time:
+        filters.append(Earthquake.reported_at <= end_time)
+    if min_depth is not None:
+        filters.append(Earthquake.depth_km >= min_depth)
+    if max_depth is not None:
+        filters.append(Earthquake.depth_km <= max_depth)
+    return filters
+
+
+def read_earthquakes(
+    db: Session,
+    count: Optional[int] = 10,
+    cursor: Optional[str] = None,
+    **filters
+):
+    """One page of matching earthquakes, newest first, and the next page's cursor."""
+    query = db.query(Earthquake).filter(*earthquake_filters(**filters))
+    earthquakes, next_cursor = keyset_page(
+        query, Earthquake.reported_at, Earthquake.earthquake_id, count, cursor)
 
     earthquakes = [EarthquakeSchema.from_data(quake) for quake in earthquakes]
 
-    return earthquakes
+    return earthquakes, next_cursor
+
+
+def earthquake_feature():
+    """``EarthquakeSchema.from_data`` as a ``json_build_object`` expression."""
+    return build_feature(
+        json_object(type="Point",
+                    coordinates=point_coordinates(Earthquake.epicenter,
+                                                  func.coalesce(Earthquake.depth_km, 0))),
+        earthquake_id=cast(Earthquake.earthquake_id, Text),
+        gdacs_id=Earthquake.gdacs_id,
+        mag=Earthquake.magnitude,
+        reported_at=Earthquake.reported_at,
+        source=Earthquake.source,
+        usgs_id=Earthquake.usgs_id,
+        title=Earthquake.title,
+    )
+
+
+def render_earthquakes(
+    db: Session,
+    count: Optional[int] = 10,
+    cursor: Optional[str] = None,
+    **filters
+):
+    """``read_earthquakes`` rendered to GeoJSON bytes by PostgreSQL."""
+    return render_features(db, earthquake_feature(), Earthquake.reported_at,
+                           Earthquake.earthquake_id, earthquake_filters(**filters),
+                           count, cursor)
+
+
+async def render_earthquakes_async(
+    db: AsyncSession,
+    count: Optional[int] = 10,
+    cursor: Optional[str] = None,
+    **filters
+):
+    """``render_earthquakes`` on an async session."""
+    return await render_features_async(db, earthquake_feature(), Earthquake.reported_at,
+                                       Earthquake.earthquake_id, earthquake_filters(**filters),
+                                       count, cursor)
 
 # Insert an earthquake into the DB
 
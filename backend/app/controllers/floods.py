@@ -1,42 +1,70 @@
 from typing import Optional
-from ..models import Flood as FloodModel
-from sqlalchemy import func
-from sqlalchemy.orm import Session
-from geoalchemy2.shape import from_shape
-from shapely.geometry import Polygon
+from ..models import Flood as FloodModel, affected_area_column
+from sqlalchemy import Text, cast, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, load_only
 from shapely.geometry import box
 from datetime import datetime, timedelta
 
+from ..geojson import (build_feature, json_object, multipolygon_geojson, point_coordinates,
+                       render_features, render_features_async)
+from ..pagination import keyset_page
 from ..schemas import Flood as FloodSchema
+from ..spatial import spatial_filters
 from ..utils import get_open_meteo_data
 
 
-def read_floods(db: Session, start_time: Optional[datetime] = None, end_time: Optional[datetime] = None, min_lat: Optional[float] = None, max_lat: Optional[float] = None, min_lon: Optional[float] = None, max_lon: Optional[float] = None, severity_level: Optional[str] = None, count: Optional[int] = 10):
-    query = db.query(FloodModel)
-
+def flood_filters(start_time: Optional[datetime] = None, end_time: Optional[datetime] = None, min_lat: Optional[float] = None, max_lat: Optional[float] = None, min_lon: Optional[float] = None, max_lon: Optional[float] = None, severity_level: Optional[str] = None, lat: Optional[float] = None, lon: Optional[float] = None, radius_km: Optional[float] = None, polygon: Optional[str] = None):
+    filters = spatial_filters(FloodModel.epicenter, min_lat, max_lat, min_lon, max_lon,
+                              lat, lon, radius_km, polygon)
     if start_time:
-        query = query.filter(FloodModel.reported_at >= start_time)
+        filters.append(FloodModel.reported_at >= start_time)
     if end_time:
-        query = query.filter(FloodModel.reported_at <= end_time)
-    if min_lat and max_lat and min_lon and max_lon:
-        polygon = Polygon([
-            (min_lon, min_lat),
-            (max_lon, min_lat),
-            (max_lon, max_lat),
-            (min_lon, max_lat),
-            (min_lon, min_lat)
-        ])
-        query = query.filter(
-            func.ST_Within(FloodModel.epicenter,
-                           from_shape(polygon, srid=4326))
-        )
+        filters.append(FloodModel.reported_at <= end_time)
     if severity_level:
-        query = query.filter(FloodModel.severity_level == severity_level)
-
-    floods = query.order_by(
-        FloodModel.reported_at.desc()).limit(count).all()
-    floods = [FloodSchema.from_data(flood) for flood in floods]
-    return floods
+        filters.append(FloodModel.severity_level == severity_level)
+    return filters
+
+
+def read_floods(db: Session, count: Optional[int] = 10, lod: str = "full", cursor: Optional[str] = None, **filters):
+    # Only the polygon of the requested level of detail is read.
+    query = db.query(FloodModel, affected_area_column(FloodModel, lod)).options(load_only(
+        FloodModel.flood_id, FloodModel.gdacs_id, FloodModel.severity_level,
+        FloodModel.epicenter, FloodModel.reported_at, FloodModel.source, FloodModel.area_km2))
+    query = query.filter(*flood_filters(**filters))
+
+    floods, next_cursor = keyset_page(
+        query, FloodModel.reported_at, FloodModel.flood_id, count, cursor)
+    floods = [FloodSchema.from_data(flood, affected_area)
+              for flood, affected_area in floods]
+    return floods, next_cursor
+
+
+def flood_feature(lod: str = "full"):
+    """``FloodSchema.from_data`` as a ``json_build_object`` expression."""
+    return build_feature(
+        multipolygon_geojson(affected_area_column(FloodModel, lod)),
+        flood_id=cast(FloodModel.flood_id, Text),
+        gdacs_id=FloodModel.gdacs_id,
+        severity_level=func.lower(cast(FloodModel.severity_level, Text)),
+        reported_at=FloodModel.reported_at,
+        source=FloodModel.source,
+        area_km2=FloodModel.area_km2,
+        epicenter=json_object(type="POINT",
+                              coordinates=point_coordinates(FloodModel.epicenter)),
+    )
+
+
+def render_floods(db: Session, count: Optional[int] = 10, lod: str = "full", cursor: Optional[str] = None, **filters):
+    """``read_floods`` rendered to GeoJSON bytes by PostgreSQL."""
+    return render_features(db, flood_feature(lod), FloodModel.reported_at, FloodModel.flood_id,
+                           flood_filters(**filters), count, cursor)
+
+
+async def render_floods_async(db: AsyncSession, count: Optional[int] = 10, lod: str = "full", cursor: Optional[str] = None, **filters):
+    """``render_floods`` on an async session."""
+    return await render_features_async(db, flood_feature(lod), FloodModel.reported_at, FloodModel.flood_id,
+                                       flood_filters(**filters), count, cursor)
 
 
 def get_risk_for_bounding_box(db: Session, min_lat: float, max_lat: float, min_lon: float, max_lon: float, grid_size: float = 0.1, past_days: int = 3) -> dict:
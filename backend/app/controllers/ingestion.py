@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import Float, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import IngestionCursor, IngestionRun
+
+
+def _seconds_since(moment: Optional[datetime], now: datetime):
+    return round((now - moment).total_seconds(), 1) if moment else None
+
+
+async def read_freshness(db: AsyncSession, kind: str = "realtime", hours: int = 24):
+    """
+    Per-source freshness and throughput over the last ``hours`` of runs:
+    time since the last successful run, how far the source cursor trails
+    now, and features/sec and duration percentiles.
+    """
+    now = datetime.utcnow()
+    duration_s = func.greatest(
+        func.extract("epoch", IngestionRun.finished_at - IngestionRun.started_at), 0.001)
+    throughput = cast(IngestionRun.features, Float) / duration_s
+
+    def percentile(fraction, expr):
+        return func.percentile_cont(fraction).within_group(expr)
+
+    rows = (await db.execute(select(
+        IngestionRun.source,
+        func.max(IngestionRun.finished_at).label("last_run_at"),
+        func.max(IngestionRun.finished_at).filter(
+            IngestionRun.succeeded).label("last_success_at"),
+        func.count().label("runs"),
+        func.count().filter(~IngestionRun.succeeded).label("failed_runs"),
+        func.sum(IngestionRun.errors).label("errors"),
+        percentile(0.5, throughput).label("features_per_sec_p50"),
+        percentile(0.95, throughput).label("features_per_sec_p95"),
+        percentile(0.99, throughput).label("features_per_sec_p99"),
+        percentile(0.5, duration_s).label("duration_s_p50"),
+        percentile(0.95, duration_s).label("duration_s_p95"),
+    ).where(
+        IngestionRun.kind == kind,
+        IngestionRun.finished_at >= now - timedelta(hours=hours),
+    ).group_by(IngestionRun.source))).all()
+
+    cursors = {cursor.source: cursor.position
+               for cursor in (await db.execute(select(IngestionCursor))).scalars()}
+
+    def rounded(value):
+        return round(value, 3) if value is not None else None
+
+    return [
+        {
+            "source": row.source,
+            "last_run_at": row.last_run_at.isoformat() if row.last_run_at else None,
+            "last_success_at": row.last_success_at.isoformat() if row.last_success_at else None,
+            "lag_seconds": _seconds_since(row.last_success_at, now),
+            "cursor_position": cursors[row.source].isoformat() if row.source in cursors else None,
+            "cursor_lag_seconds": _seconds_since(cursors.get(row.source), now),
+            "runs": row.runs,
+            "failed_runs": row.failed_runs,
+            "errors": row.errors or 0,
+            "features_per_sec": {
+                "p50": rounded(row.features_per_sec_p50),
+                "p95": rounded(row.features_per_sec_p95),
+                "p99": rounded(row.features_per_sec_p99),
+            },
+            "duration_s": {
+                "p50": rounded(row.duration_s_p50),
+                "p95": rounded(row.duration_s_p95),
+            },
+        }
+        for row in rows
+    ]
@@ -1,29 +1,67 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy.orm import Session
+from sqlalchemy import Text, cast, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, load_only
 
-from ..models import Wildfire as WildfireModel
+from ..models import Wildfire as WildfireModel, affected_area_column
+from ..geojson import (build_feature, json_object, multipolygon_geojson, point_coordinates,
+                       render_features, render_features_async)
+from ..pagination import keyset_page
 from ..schemas import Wildfire as WildfireSchema
+from ..spatial import spatial_filters
 
 
-def read_wildfires(db: Session, start_time: Optional[datetime] = None, end_time: Optional[datetime] = None, min_lat: Optional[float] = None, max_lat: Optional[float] = None, min_lon: Optional[float] = None, max_lon: Optional[float] = None, severity_level: Optional[str] = None, count: Optional[int] = 10):
-    query = db.query(WildfireModel)
-
+def wildfire_filters(start_time: Optional[datetime] = None, end_time: Optional[datetime] = None, min_lat: Optional[float] = None, max_lat: Optional[float] = None, min_lon: Optional[float] = None, max_lon: Optional[float] = None, severity_level: Optional[str] = None, lat: Optional[float] = None, lon: Optional[float] = None, radius_km: Optional[float] = None, polygon: Optional[str] = None):
+    filters = spatial_filters(WildfireModel.epicenter, min_lat, max_lat, min_lon, max_lon,
+                              lat, lon, radius_km, polygon)
     if start_time:
-        query = query.filter(WildfireModel.reported_at >= start_time)
+        filters.append(WildfireModel.reported_at >= start_time)
     if end_time:
-        query = query.filter(WildfireModel.reported_at <= end_time)
-    if min_lat and max_lat and min_lon and max_lon:
-        query = query.filter(
-            WildfireModel.epicenter.ST_Within(
-                f'POLYGON(({min_lon} {min_lat}, {max_lon} {min_lat}, {max_lon} {max_lat}, {min_lon} {max_lat}, {min_lon} {min_lat}))'
-            )
-        )
+        filters.append(WildfireModel.reported_at <= end_time)
     if severity_level:
-        query = query.filter(WildfireModel.severity_level == severity_level)
+        filters.append(WildfireModel.severity_level == severity_level)
+    return filters
+
+
+def read_wildfires(db: Session, count: Optional[int] = 10, lod: str = "full", cursor: Optional[str] = None, **filters):
+    # Only the polygon of the requested level of detail is read.
+    query = db.query(WildfireModel, affected_area_column(WildfireModel, lod)).options(load_only(
+        WildfireModel.wildfire_id, WildfireModel.gdacs_id, WildfireModel.severity_level,
+        WildfireModel.epicenter, WildfireModel.reported_at, WildfireModel.source,
+        WildfireModel.area_km2))
+    query = query.filter(*wildfire_filters(**filters))
+
+    wildfires, next_cursor = keyset_page(
+        query, WildfireModel.reported_at, WildfireModel.wildfire_id, count, cursor)
+    wildfires = [WildfireSchema.from_data(wildfire, affected_area)
+                 for wildfire, affected_area in wildfires]
+    return wildfires, next_cursor
+
+
+def wildfire_feature(lod: str = "full"):
+    """``WildfireSchema.from_data`` as a ``json_build_object`` expression."""
+    return build_feature(
+        multipolygon_geojson(affected_area_column(WildfireModel, lod)),
+        wildfire_id=cast(WildfireModel.wildfire_id, Text),
+        gdacs_id=WildfireModel.gdacs_id,
+        severity_level=func.lower(cast(WildfireModel.severity_level, Text)),
+        reported_at=WildfireModel.reported_at,
+        source=WildfireModel.source,
+        area_km2=WildfireModel.area_km2,
+        epicenter=json_object(type="Point",
+                              coordinates=point_coordinates(WildfireModel.epicenter)),
+    )
+
+
+def render_wildfires(db: Session, count: Optional[int] = 10, lod: str = "full", cursor: Optional[str] = None, **filters):
+    """``read_wildfires`` rendered to GeoJSON bytes by PostgreSQL."""
+    return render_features(db, wildfire_feature(lod), WildfireModel.reported_at, WildfireModel.wildfire_id,
+                           wildfire_filters(**filters), count, cursor)
+
 
-    wildfires = query.order_by(
-        WildfireModel.reported_at.desc()).limit(count).all()
-    wildfires = [WildfireSchema.from_data(wildfire) for wildfire in wildfires]
-    return wildfires
+async def render_wildfires_async(db: AsyncSession, count: Optional[int] = 10, lod: str = "full", cursor: Optional[str] = None, **filters):
+    """``render_wildfires`` on an async session."""
+    return await render_features_async(db, wildfire_feature(lod), WildfireModel.reported_at, WildfireModel.wildfire_id,
+                                       wildfire_filters(**filters), count, cursor)
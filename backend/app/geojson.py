@@ -0,0 +1,95 @@
+from typing import Optional
+
+from sqlalchemy import JSON, Text, cast, func, literal_column, select, text
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .pagination import encode_cursor, keyset_filters
+
+
+def constant(value: str):
+    """
+    A string constant inlined into the SQL. Bound parameters of unknown type
+    cannot be passed to ``json_build_object`` with server-side binding.
+    """
+    return literal_column("'" + value.replace("'", "''") + "'", Text)
+
+
+def json_object(**members):
+    """``json_build_object`` over keyword members; str values are constants."""
+    args = []
+    for name, value in members.items():
+        args += [constant(name), constant(value) if isinstance(value, str) else value]
+    return func.json_build_object(*args)
+
+
+def point_coordinates(column, *extra):
+    """``[lon, lat, *extra]`` of a point column as a JSON array."""
+    return func.json_build_array(func.ST_X(column), func.ST_Y(column), *extra)
+
+
+def multipolygon_geojson(column):
+    """
+    GeoJSON MultiPolygon of a polygon column, as JSON. Unlike the shapely
+    path this keeps interior rings.
+    """
+    return cast(func.ST_AsGeoJSON(func.ST_Multi(column)), JSON)
+
+
+def build_feature(geometry, **properties):
+    """A GeoJSON Feature built with ``json_build_object``."""
+    return json_object(type="Feature", geometry=geometry,
+                       properties=json_object(**properties))
+
+
+def feature_page(feature, time_column, id_column, filters, count: int,
+                 cursor: Optional[str] = None):
+    """
+    One page of rows as a JSON array of ``feature``, rendered entirely in
+    PostgreSQL, newest first, with the same keyset paging as
+    ``pagination.keyset_page``. The single result row is read by
+    ``page_body``.
+    """
+    order = (time_column.desc(), id_column.desc())
+    page = (select(feature.label("feature"),
+                   time_column.label("reported_at"),
+                   cast(id_column, Text).label("row_id"),
+                   func.row_number().over(order_by=order).label("position"))
+            .where(*filters, *keyset_filters(time_column, id_column, cursor))
+            .order_by(*order)
+            .limit(count + 1)
+            .subquery())
+
+    in_page = page.c.position <= count
+    last = page.c.position == count
+    return select(
+        cast(func.coalesce(
+            func.json_agg(aggregate_order_by(page.c.feature, page.c.position)).filter(in_page),
+            text("'[]'::json")), Text),
+        func.count(),
+        func.max(page.c.reported_at).filter(last),
+        func.max(page.c.row_id).filter(last),
+    )
+
+
+def page_body(row, count: int):
+    """The JSON bytes of a ``feature_page``, ready to be sent as is, and the next page's cursor."""
+    body, fetched, last_at, last_id = row
+    next_cursor = encode_cursor(last_at, last_id) if fetched > count and last_at else None
+    return body.encode(), next_cursor
+
+
+def render_features(db: Session, feature, time_column, id_column, filters, count: int,
+                    cursor: Optional[str] = None):
+    """Run a ``feature_page``; returns the JSON bytes and the next cursor (None on the last page)."""
+    statement = feature_page(feature, time_column, id_column, filters, count, cursor)
+    return page_body(db.execute(statement).one(), count)
+
+
+async def render_features_async(db: AsyncSession, feature, time_column, id_column, filters,
+                                count: int, cursor: Optional[str] = None):
+    """``render_features`` on an async session."""
+    statement = feature_page(feature, time_column, id_column, filters, count, cursor)
+    result = await db.execute(statement)
+    return page_body(result.one(), count)
@@ -0,0 +1,63 @@
+import base64
+import binascii
+import json
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import tuple_
+from sqlalchemy.engine import Row
+
+
+class InvalidCursor(ValueError):
+    """A ``cursor`` parameter that was not issued by this API."""
+
+
+def encode_cursor(reported_at: datetime, row_id) -> str:
+    """Opaque cursor pointing just past the row ``(reported_at, row_id)``."""
+    payload = json.dumps([reported_at.isoformat(), str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        reported_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(reported_at), uuid.UUID(row_id)
+    except (binascii.Error, TypeError, ValueError) as e:
+        raise InvalidCursor(f"Invalid cursor: {e}")
+
+
+def keyset_filters(time_column, id_column, cursor: Optional[str] = None):
+    """WHERE clauses that skip to the rows after ``cursor``, if one is given."""
+    if not cursor:
+        return []
+    reported_at, row_id = decode_cursor(cursor)
+    return [tuple_(time_column, id_column) < tuple_(reported_at, row_id)]
+
+
+def keyset_page(query, time_column, id_column, count: int, cursor: Optional[str] = None):
+    """
+    One page of ``query``, newest first, ordered on ``(time_column,
+    id_column)``. Returns the rows and the cursor of the next page, or None
+    on the last page. The cursor is compared as a row value, so with a
+    composite index on both columns every page costs the same as the first.
+    ``query`` may select extra columns; its first entity must be the model.
+    """
+    query = query.filter(*keyset_filters(time_column, id_column, cursor))
+    rows = query.order_by(time_column.desc(), id_column.desc()).limit(count + 1).all()
+    if len(rows) <= count or count < 1:
+        return rows[:max(count, 0)], None
+
+    rows = rows[:count]
+    last = rows[-1]
+    model = last[0] if isinstance(last, Row) else last
+    return rows, encode_cursor(getattr(model, time_column.key), getattr(model, id_column.key))
+
+
+def set_next_cursor(request, response, next_cursor: Optional[str]):
+    """Expose the next page as ``X-Next-Cursor`` and a ``Link: rel="next"`` header."""
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+        next_url = request.url.include_query_params(cursor=next_cursor)
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
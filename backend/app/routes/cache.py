@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+
+from ..cache import response_cache
+
+router = APIRouter()
+
+
+@router.get("/stats", response_model=dict)
+def get_cache_stats():
+    """
+    Size, hit/miss counts and evictions of the response cache. Entries are
+    invalidated when ingestion (or a report) writes one of their tables.
+    """
+    return response_cache.stats()
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+
+from ..controllers.deadletters import read_dead_letters
+from .. import get_async_db
+
+router = APIRouter()
+
+
+@router.get("/", response_model=List[dict])
+async def get_dead_letters(source: str = None,
+                           parked: bool = None,
+                           include_payload: bool = False,
+                           count: int = 50,
+                           db: AsyncSession = Depends(get_async_db)):
+    """
+    List GDACS events that failed to ingest, most recent failure first.
+    ``parked`` events have used up their retries.
+    """
+    try:
+        return await read_dead_letters(db, source=source, parked=parked,
+                                       include_payload=include_payload, count=count)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error reading dead letters: {str(e)}")
@@ -3,23 +3,26 @@ import traceback
 from datetime import timedelta
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from geoalchemy2.shape import to_shape
-from sqlalchemy.orm import Session
-from sqlalchemy import text
-
-from ..utils import find_matching_gdacs_event
-
-from .. import get_db
-from ..controllers.earthquakes import read_earthquakes
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from .. import get_async_db
+from ..pagination import InvalidCursor, set_next_cursor
+from ..spatial import SpatialFilterError
+from ..controllers.earthquakes import render_earthquakes_async
 from ..models import Earthquake
 from ..schemas import Earthquake as EarthquakeSchema
+from ..utils import fetch_gdacs_events
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[EarthquakeSchema])
-def get_earthquakes(
+async def get_earthquakes(
+    request: Request,
     start_time: datetime.datetime = None,
     end_time: datetime.datetime = None,
     min_lat: float = None,
@@ -30,14 +33,23 @@ def get_earthquakes(
     max_magnitude: float = None,
     min_depth: float = None,
     max_depth: float = None,
+    lat: float = None,
+    lon: float = None,
+    radius_km: float = None,
+    polygon: str = None,
     count: int = 10,
-    db: Session = Depends(get_db)
+    cursor: str = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Retrieve a list of earthquakes based on optional filters.
+    Retrieve a list of earthquakes based on optional filters. ``radius_km``
+    around ``lat``/``lon`` and a WKT ``polygon`` narrow the results further.
+    Pages are newest first; pass the ``X-Next-Cursor`` response header back
+    as ``cursor`` for the next one. The GeoJSON is rendered by PostgreSQL
+    and sent as is.
     """
     try:
-        earthquakes = read_earthquakes(
+        body, next_cursor = await render_earthquakes_async(
             db=db,
             start_time=start_time,
             end_time=end_time,
@@ -49,9 +61,18 @@ def get_earthquakes(
             max_magnitude=max_magnitude,
             min_depth=min_depth,
             max_depth=max_depth,
+            lat=lat,
+            lon=lon,
+            radius_km=radius_km,
+            polygon=polygon,
             count=count,
+            cursor=cursor,
         )
-        return earthquakes
+        response = Response(content=body, media_type="application/json")
+        set_next_cursor(request, response, next_cursor)
+        return response
+    except (SpatialFilterError, InvalidCursor) as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         error_traceback = traceback.format_exc()
         raise HTTPException(
@@ -59,10 +80,10 @@ def get_earthquakes(
 
 
 @router.get("/aftershocks/{earthquake_id}", response_model=dict)
-def get_aftershock_geojson(earthquake_id: str, db: Session = Depends(get_db)):
+async def get_aftershock_geojson(earthquake_id: str, db: AsyncSession = Depends(get_async_db)):
 
-    quake = db.query(Earthquake).filter(
-        Earthquake.earthquake_id == earthquake_id).first()
+    quake = (await db.execute(select(Earthquake).where(
+        Earthquake.earthquake_id == earthquake_id))).scalars().first()
     if not quake:
         raise HTTPException(status_code=404, detail="Earthquake not found")
 
@@ -102,7 +123,7 @@ def get_aftershock_geojson(earthquake_id: str, db: Session = Depends(get_db)):
         "radius_meters": region_radius_km * 1000,
         "main_magnitude": quake.magnitude
     }
-    result = db.execute(query, params)
+    result = await db.execute(query, params)
     rows = result.fetchall()
 
     features = []
@@ -136,22 +157,27 @@ def get_aftershock_geojson(earthquake_id: str, db: Session = Depends(get_db)):
 
 
 @router.get("/getGDASCevent/{earthquake_id}", response_model=dict)
-def get_gdasc_event(earthquake_id: str, db: Session = Depends(get_db)):
+async def get_gdasc_event(earthquake_id: str, db: AsyncSession = Depends(get_async_db)):
     """
-    Retrieve the GDASC ID for a given earthquake ID.
+    Retrieve the GDASC event feature matched to a given earthquake ID.
+    Matches and their event are stored during ingestion, so this is a
+    primary-key read; quakes matched before the event was stored are looked
+    up in the GDACS event list of their day.
     """
-    quake = db.query(Earthquake).filter(
-        Earthquake.earthquake_id == earthquake_id).first()
+    quake = (await db.execute(select(Earthquake).where(
+        Earthquake.earthquake_id == earthquake_id))).scalars().first()
     if not quake:
         raise HTTPException(status_code=404, detail="Earthquake not found")
-
-    quake = EarthquakeSchema.from_data(quake)
-    coords = quake.geometry["coordinates"]
-    props = quake.properties
-    gdacs_event = find_matching_gdacs_event(props, coords)
-    if not gdacs_event:
+    if not quake.gdacs_id:
         raise HTTPException(status_code=404, detail="GDASC event not found")
-    if "matched_event" in gdacs_event:
-        gdacs_event = gdacs_event["matched_event"]
 
-    return gdacs_event
+    if quake.gdacs_event:
+        return quake.gdacs_event
+
+    start = (quake.reported_at - timedelta(days=1)).strftime("%Y-%m-%d")
+    end = (quake.reported_at + timedelta(days=1)).strftime("%Y-%m-%d")
+    events = await run_in_threadpool(fetch_gdacs_events, start, end, ["EQ"])
+    for event in events:
+        if str(event.get("properties", {}).get("eventid")) == quake.gdacs_id:
+            return event
+    raise HTTPException(status_code=404, detail="GDASC event not found")
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+
+from ..controllers.ingestion import read_freshness
+from .. import get_async_db
+
+router = APIRouter()
+
+
+@router.get("/freshness", response_model=List[dict])
+async def get_freshness(kind: str = "realtime", hours: int = 24, db: AsyncSession = Depends(get_async_db)):
+    """
+    Per-source ingestion lag and throughput percentiles, for alerting when
+    realtime ingestion falls behind.
+    """
+    try:
+        return await read_freshness(db, kind=kind, hours=hours)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error reading ingestion freshness: {str(e)}")
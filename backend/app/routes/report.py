@@ -1,6 +1,8 @@
 from datetime import datetime
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 
@@ -8,7 +10,7 @@ from ..models import Wildfire as WildfireModel, Earthquake as EarthquakeModel, F
 
 from ..schemas import Report as ReportSchema, Earthquake as EarthquakeSchema, Flood as FloodSchema, Wildfire as WildfireSchema
 from ..controllers.report import generate_report
-from .. import get_db
+from .. import get_async_db, get_db
 from ..models import Report as ReportModel, DisasterTypeEnum, User as UserModel
 from ..utils import find_matching_gdacs_event, get_latest_alert_info
 import random
@@ -99,7 +101,7 @@ def get_reports(gdacs_id: Optional[str] = None, eventtype: Optional[str] = None,
 
 
 @router.get("/latest")
-def get_latest_reports(count: int, session: Session = Depends(get_db)):
+async def get_latest_reports(count: int, session: AsyncSession = Depends(get_async_db)):
 
     if count < 3:
         raise HTTPException(
@@ -115,14 +117,14 @@ def get_latest_reports(count: int, session: Session = Depends(get_db)):
     random.shuffle(random_numbers)
 
     try:
-        floods = session.query(FloodModel).order_by(
-            FloodModel.reported_at.desc()).limit(random_numbers[0]).all()
+        floods = (await session.execute(select(FloodModel).order_by(
+            FloodModel.reported_at.desc()).limit(random_numbers[0]))).scalars().all()
 
-        quakes = session.query(EarthquakeModel).order_by(
-            EarthquakeModel.reported_at.desc()).limit(random_numbers[1]).all()
+        quakes = (await session.execute(select(EarthquakeModel).order_by(
+            EarthquakeModel.reported_at.desc()).limit(random_numbers[1]))).scalars().all()
 
-        fires = session.query(WildfireModel).order_by(
-            WildfireModel.reported_at.desc()).limit(random_numbers[2]).all()
+        fires = (await session.execute(select(WildfireModel).order_by(
+            WildfireModel.reported_at.desc()).limit(random_numbers[2]))).scalars().all()
 
         flood_reports = []
         quake_reports = []
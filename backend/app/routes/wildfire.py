@@ -1,37 +1,53 @@
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal
 
 from ..schemas import Wildfire as WildfireSchema
-from ..controllers.wildfire import read_wildfires
-from .. import get_db
+from ..controllers.wildfire import render_wildfires_async
+from .. import get_async_db
+from ..pagination import InvalidCursor, set_next_cursor
+from ..spatial import SpatialFilterError
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[WildfireSchema])
-def get_wildfires(db: Session = Depends(get_db),
-                  start_time: datetime = None,
-                  end_time: datetime = None,
-                  min_lat: float = None,
-                  max_lat: float = None,
-                  min_lon: float = None,
-                  max_lon: float = None,
-                  severity_level: str = None, count: int = 10):
+async def get_wildfires(request: Request,
+                        db: AsyncSession = Depends(get_async_db),
+                        start_time: datetime = None,
+                        end_time: datetime = None,
+                        min_lat: float = None,
+                        max_lat: float = None,
+                        min_lon: float = None,
+                        max_lon: float = None,
+                        severity_level: str = None, count: int = 10,
+                        lod: Literal["full", "medium", "low"] = "full",
+                        lat: float = None,
+                        lon: float = None,
+                        radius_km: float = None,
+                        polygon: str = None,
+                        cursor: str = None):
     """
     Retrieve the latest flood alerts from GDACS.
     """
     try:
-        wildfire_alerts = read_wildfires(db,
-                                         start_time=start_time,
-                                         end_time=end_time,
-                                         min_lat=min_lat,
-                                         max_lat=max_lat,
-                                         min_lon=min_lon,
-                                         max_lon=max_lon,
-                                         severity_level=severity_level, count=count)
-        return wildfire_alerts
+        body, next_cursor = await render_wildfires_async(db,
+                                                         start_time=start_time,
+                                                         end_time=end_time,
+                                                         min_lat=min_lat,
+                                                         max_lat=max_lat,
+                                                         min_lon=min_lon,
+                                                         max_lon=max_lon,
+                                                         severity_level=severity_level, count=count,
+                                                         lod=lod, lat=lat, lon=lon,
+                                                         radius_km=radius_km, polygon=polygon,
+                                                         cursor=cursor)
+        response = Response(content=body, media_type="application/json")
+        set_next_cursor(request, response, next_cursor)
+        return response
+    except (SpatialFilterError, InvalidCursor) as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error fetching flood alerts: {str(e)}")
\ No newline at end of file
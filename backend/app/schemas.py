@@ -40,8 +40,10 @@ class Flood(BaseModel):
     properties: Dict[str, Any]
 
     @staticmethod
-    def from_data(flood) -> "Flood":
-        affected_area = to_shape(flood.affected_area)
+    def from_data(flood, affected_area=None) -> "Flood":
+        # affected_area is passed when a simplified level of detail was queried.
+        affected_area = to_shape(
+            affected_area if affected_area is not None else flood.affected_area)
         epicenter = to_shape(flood.epicenter)
 
         # Ensure it's a MultiPolygon
@@ -69,6 +71,7 @@ class Flood(BaseModel):
                 "severity_level": flood.severity_level,
                 "reported_at": flood.reported_at.isoformat(),
                 "source": flood.source,
+                "area_km2": flood.area_km2,
                 "epicenter": {
                     "type": "POINT",
                     "coordinates": [
@@ -86,8 +89,10 @@ class Wildfire(BaseModel):
     properties: Dict[str, Any]
 
     @staticmethod
-    def from_data(wildfire) -> "Wildfire":
-        affected_area = to_shape(wildfire.affected_area)
+    def from_data(wildfire, affected_area=None) -> "Wildfire":
+        # affected_area is passed when a simplified level of detail was queried.
+        affected_area = to_shape(
+            affected_area if affected_area is not None else wildfire.affected_area)
         epicenter = to_shape(wildfire.epicenter)
 
         # Ensure it's a MultiPolygon9
@@ -115,6 +120,7 @@ class Wildfire(BaseModel):
                 "severity_level": wildfire.severity_level,
                 "reported_at": wildfire.reported_at.isoformat(),
                 "source": wildfire.source,
+                "area_km2": wildfire.area_km2,
                 "epicenter": {
                     "type": "Point",
                     "coordinates": [
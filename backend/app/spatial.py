@@ -0,0 +1,64 @@
+from typing import Optional
+
+from geoalchemy2.shape import from_shape
+from shapely import wkt
+from shapely.geometry import MultiPolygon, Polygon
+from sqlalchemy import func
+
+
+class SpatialFilterError(ValueError):
+    """A spatial filter parameter that cannot be turned into a predicate."""
+
+
+def envelope(min_lat: Optional[float] = None, max_lat: Optional[float] = None,
+             min_lon: Optional[float] = None, max_lon: Optional[float] = None):
+    """
+    ``ST_MakeEnvelope`` for a bounding box. Missing edges default to the
+    edges of the world, so a box can be open on any side.
+    """
+    return func.ST_MakeEnvelope(
+        -180 if min_lon is None else min_lon,
+        -90 if min_lat is None else min_lat,
+        180 if max_lon is None else max_lon,
+        90 if max_lat is None else max_lat,
+        4326)
+
+
+def parse_polygon(polygon: str):
+    """Parse a WKT polygon filter, raising ``SpatialFilterError`` when it is not one."""
+    try:
+        shape = wkt.loads(polygon)
+    except Exception as e:
+        raise SpatialFilterError(f"Invalid polygon: {e}")
+    if not isinstance(shape, (Polygon, MultiPolygon)) or not shape.is_valid:
+        raise SpatialFilterError("polygon must be a valid WKT POLYGON or MULTIPOLYGON")
+    return from_shape(shape, srid=4326)
+
+
+def spatial_filters(column,
+                    min_lat: Optional[float] = None, max_lat: Optional[float] = None,
+                    min_lon: Optional[float] = None, max_lon: Optional[float] = None,
+                    lat: Optional[float] = None, lon: Optional[float] = None,
+                    radius_km: Optional[float] = None, polygon: Optional[str] = None):
+    """
+    WHERE clauses on the geometry ``column`` for whichever of the bounding
+    box, radius and polygon filters are set. Every clause can use a GiST
+    index: the box is matched with ``&&`` (exact for points), the radius
+    with ``ST_DWithin`` on the ``geography`` expression index, and the
+    polygon with ``ST_Intersects``.
+    """
+    filters = []
+    if any(edge is not None for edge in (min_lat, max_lat, min_lon, max_lon)):
+        filters.append(column.op("&&")(envelope(min_lat, max_lat, min_lon, max_lon)))
+
+    if radius_km is not None:
+        if lat is None or lon is None:
+            raise SpatialFilterError("radius_km needs lat and lon")
+        center = func.ST_SetSRID(func.ST_MakePoint(lon, lat), 4326)
+        filters.append(func.ST_DWithin(
+            func.geography(column), func.geography(center), radius_km * 1000))
+
+    if polygon:
+        filters.append(func.ST_Intersects(column, parse_polygon(polygon)))
+
+    return filters
@@ -6,9 +6,9 @@ from google.genai import types
 from google import genai
 from newsapi import NewsApiClient
 from datetime import datetime, timedelta
-import requests
 import xmltodict
 from geopy.distance import geodesic
+from . import http_client
 
 
 def parse_usgs_geojson(properties, coords):
@@ -32,7 +32,7 @@ def fetch_gdacs_events(from_date, to_date, event_type=["EQ", "FL"]):
         f"https://www.gdacs.org/gdacsapi/api/Events/geteventlist/search"
         f"?fromDate={from_date}&toDate={to_date}&alertlevel=Green;Orange;Red&eventlist={';'.join(event_type)}"
     )
-    response = requests.get(url)
+    response = http_client.get(url)
     data = response.json()
     events = data.get("features", [])
     return events
@@ -44,7 +44,7 @@ def get_open_meteo_data(lat, lon, past_days=3):
         f"latitude={lat}&longitude={lon}&past_days={past_days}&forecast_days=1"
         f"&hourly=precipitation,soil_moisture_0_to_1cm"
     )
-    r = requests.get(url)
+    r = http_client.get(url)
     if r.status_code != 200:
         raise Exception("Open-Meteo API request failed")
     precipitation = r.json().get("hourly", {}).get("precipitation", [])
@@ -87,7 +87,7 @@ def find_matching_gdacs_event(properties, coords):
 
 def fetch_gdacs_event_details(event_id):
     url = f"https://www.gdacs.org/gdacsapi/api/event/{event_id}"
-    response = requests.get(url)
+    response = http_client.get(url)
     data = xmltodict.parse(response.text)
     return data['gdacs']['event'] if 'gdacs' in data and 'event' in data['gdacs'] else None
 
@@ -123,7 +123,7 @@ def get_latest_alert_info(gdacs_id, event_type):
             "eventtype": event_type,
             "eventid": gdacs_id
         }
-        response = requests.get(url, params=params, timeout=60)
+        response = http_client.get(url, params=params, timeout=60)
         if response.status_code != 200:
             raise HTTPException(
                 status_code=response.status_code, detail=f"Error fetching event.")
@@ -207,7 +207,7 @@ def query_gnewsapi(query, from_date, to_date):
         "to": to_iso,
         "sortby": "relevance"
     }
-    res = requests.get(url, params=params)
+    res = http_client.get(url, params=params)
     print(f"\n📰 GNews results for: {query}")
     for article in res.json().get("articles", []):
         print(
@@ -224,7 +224,7 @@ def query_reddit(query, alert_info):
         "sort": "new",
         "limit": 5
     }
-    res = requests.get(url, headers=headers, params=params)
+    res = http_client.get(url, headers=headers, params=params)
     print(f"\n🗣️ Reddit /r/news results for: {query}")
     posts = [post["data"]
              for post in res.json().get("data", {}).get("children", [])]
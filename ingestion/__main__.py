@@ -2,10 +2,15 @@ from datetime import date
 import datetime
 import os
 import importlib
-from time import sleep
+import asyncio
+from functools import partial
 
 from .fetch_realtime import fetch_and_store_realtime_eq, fetch_and_store_realtime_fl, fetch_and_store_realtime_wf
-from .fetch_historical import fetch_and_store_historical_eq, fetch_and_store_historical_fl, fetch_and_store_historical_wf
+from .backfill import backfill
+from .leases import leased
+from .ledger import recorded
+from .retry import retry_dead_letters
+from .scheduler import ScheduledSource, Scheduler
 
 print("Starting Earthquake Ingestion...")
 
@@ -19,21 +24,37 @@ if os.getenv("MIGRATE_DB", "false") == "true":
 if os.getenv("GET_HISTORICAL", "false") == "true":
     print("Running historical ingestion...")
     try:
-        starttime = datetime.datetime.now() - datetime.timedelta(days=365)
+        days = int(os.getenv("HISTORICAL_DAYS", "365"))
+        starttime = datetime.datetime.now() - datetime.timedelta(days=days)
         endtime = datetime.datetime.now()
-        fetch_and_store_historical_eq(starttime, endtime)
-        fetch_and_store_historical_fl(starttime, endtime)
-        fetch_and_store_historical_wf(starttime, endtime)
+        loader = os.getenv("HISTORICAL_LOADER", "orm")
+        for source in ("EQ", "FL", "WF"):
+            backfill(source, starttime, endtime, loader=loader)
     except Exception as e:
         print("❌ Error during historical ingestion:", e)
 
-while True:
-    print("Running realtime ingestion...")
-    try:
-        interval = int(os.getenv("REALTIME_FETCH_INTERVAL", "300"))
-        fetch_and_store_realtime_fl()
-        fetch_and_store_realtime_wf()
-        fetch_and_store_realtime_eq(interval + 60)
-        sleep(interval)
-    except Exception as e:
-        print("❌ Error during realtime ingestion:", e)
+print("Running realtime ingestion...")
+interval = int(os.getenv("REALTIME_FETCH_INTERVAL", "300"))
+jitter = float(os.getenv("REALTIME_FETCH_JITTER", "0.1"))
+
+
+def realtime_source(name, func, source_interval, kind="realtime"):
+    # Only the worker holding a source's lease polls it, so several ingestion
+    # containers never fetch the same source twice. The lease lapses after
+    # three missed polls and another worker takes the source over.
+    return ScheduledSource(
+        name, leased(f"{kind}:{name}", source_interval * 3, recorded(name, kind, func)),
+        source_interval, jitter)
+
+
+scheduler = Scheduler([
+    realtime_source("EQ", partial(fetch_and_store_realtime_eq, interval + 60),
+                    int(os.getenv("EQ_FETCH_INTERVAL", interval))),
+    realtime_source("FL", fetch_and_store_realtime_fl,
+                    int(os.getenv("FL_FETCH_INTERVAL", interval))),
+    realtime_source("WF", fetch_and_store_realtime_wf,
+                    int(os.getenv("WF_FETCH_INTERVAL", interval))),
+    realtime_source("DLQ", retry_dead_letters,
+                    int(os.getenv("DEADLETTER_RETRY_INTERVAL", interval)), kind="retry"),
+])
+asyncio.run(scheduler.run())
@@ -0,0 +1,171 @@
+# ingestion/backfill.py
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+from sqlalchemy.dialects.postgresql import insert
+
+from .fetch_historical import (SessionLocal, fetch_and_store_historical_eq,
+                               fetch_and_store_historical_fl,
+                               fetch_and_store_historical_wf)
+from .copy_loader import (copy_load_historical_eq, copy_load_historical_fl,
+                          copy_load_historical_wf)
+from .leases import Lease
+from .ledger import run_recorded
+from .loaders import add_counts, new_counts
+from .models import BackfillCheckpoint
+
+BACKFILL_WORKERS = int(os.getenv("BACKFILL_WORKERS", "4"))
+BACKFILL_WINDOW_DAYS = float(os.getenv("BACKFILL_WINDOW_DAYS", "7"))
+
+HISTORICAL_LOADER = os.getenv("HISTORICAL_LOADER", "orm")
+# Windows are leased so several workers can share one backfill. A lease is
+# renewed while its window runs; a crashed worker's windows are picked up by
+# the others once the lease lapses.
+BACKFILL_LEASE_SECONDS = int(os.getenv("BACKFILL_LEASE_SECONDS", "600"))
+BACKFILL_LEASE_POLL_SECONDS = int(os.getenv("BACKFILL_LEASE_POLL_SECONDS", "30"))
+
+# Returned for a window another worker holds.
+LEASED = object()
+
+HISTORICAL_FETCHERS = {
+    "orm": {
+        "EQ": fetch_and_store_historical_eq,
+        "FL": fetch_and_store_historical_fl,
+        "WF": fetch_and_store_historical_wf,
+    },
+    # COPY into a staging table, then one INSERT ... SELECT per window.
+    "copy": {
+        "EQ": copy_load_historical_eq,
+        "FL": copy_load_historical_fl,
+        "WF": copy_load_historical_wf,
+    },
+}
+
+# Windows are aligned to this grid so a restarted backfill produces the same
+# window boundaries and can match them against recorded checkpoints.
+WINDOW_EPOCH = datetime(1970, 1, 1)
+
+
+def split_windows(starttime, endtime, window):
+    """
+    Split ``[starttime, endtime)`` into windows aligned on ``window``.
+
+    Returns ``(start, end, complete)`` tuples. The first and last windows are
+    clipped to the requested range; ``complete`` is False for a clipped
+    window, since its boundaries shift from run to run and it cannot be
+    matched against a checkpoint.
+    """
+    offset = (starttime - WINDOW_EPOCH) // window
+    grid_start = WINDOW_EPOCH + offset * window
+
+    windows = []
+    while grid_start < endtime:
+        grid_end = grid_start + window
+        windows.append((max(grid_start, starttime), min(grid_end, endtime),
+                        grid_start >= starttime and grid_end <= endtime))
+        grid_start = grid_end
+    return windows
+
+
+def completed_windows(source):
+    session = SessionLocal()
+    try:
+        rows = session.query(BackfillCheckpoint.window_start, BackfillCheckpoint.window_end).filter(
+            BackfillCheckpoint.source == source).all()
+    finally:
+        session.close()
+    return {(start, end) for start, end in rows}
+
+
+def mark_completed(source, starttime, endtime):
+    session = SessionLocal()
+    try:
+        session.execute(insert(BackfillCheckpoint).values(
+            source=source,
+            window_start=starttime,
+            window_end=endtime,
+            completed_at=datetime.utcnow(),
+        ).on_conflict_do_nothing())
+        session.commit()
+    finally:
+        session.close()
+
+
+def _run_window(source, fetch, start, end, complete):
+    with Lease(f"backfill:{source}:{start.isoformat()}:{end.isoformat()}",
+               BACKFILL_LEASE_SECONDS) as lease:
+        if not lease.held:
+            return LEASED
+        # Another worker may have finished it since the checkpoints were read.
+        if complete and (start, end) in completed_windows(source):
+            return new_counts()
+
+        counts = run_recorded(source, "historical", fetch, start, end,
+                              window=(start, end))
+        # Checkpoint before the lease is released, so no other worker
+        # sees the window free and unfinished.
+        if counts is not None and complete:
+            mark_completed(source, start, end)
+        return counts
+
+
+def backfill(source, starttime, endtime, workers=BACKFILL_WORKERS, window_days=BACKFILL_WINDOW_DAYS, loader=HISTORICAL_LOADER):
+    """
+    Backfill ``source`` ("EQ", "FL" or "WF") between ``starttime`` and
+    ``endtime`` in parallel time windows, skipping windows that an earlier
+    run already checkpointed. ``loader`` picks the "orm" batch writer or the
+    "copy" staging loader.
+
+    Windows leased by other workers are waited for, and taken over if their
+    lease lapses. Clipped edge windows cannot be checkpointed, so they are
+    left to whichever worker leased them.
+    """
+    fetch = HISTORICAL_FETCHERS[loader][source]
+    windows = split_windows(starttime, endtime, timedelta(days=window_days))
+    done = completed_windows(source)
+    todo = [w for w in windows if (w[0], w[1]) not in done]
+
+    print(f"Backfilling {source}: {len(todo)} of {len(windows)} windows "
+          f"pending, {workers} workers, {loader} loader.")
+    started = time.monotonic()
+
+    totals = new_counts()
+    failed = 0
+    while todo:
+        leased = []
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_run_window, source, fetch, start, end, complete):
+                       (start, end, complete) for start, end, complete in todo}
+
+            for future in as_completed(futures):
+                start, end, complete = futures[future]
+                try:
+                    counts = future.result()
+                except Exception as e:
+                    counts = None
+                    print(f"❌ {source} window {start} - {end} failed: {e}")
+
+                if counts is LEASED:
+                    if complete:
+                        leased.append((start, end, complete))
+                    continue
+                if counts is None:
+                    failed += 1
+                    continue
+                add_counts(totals, counts)
+
+        todo = []
+        if leased:
+            print(f"{source}: {len(leased)} windows leased by other workers, waiting.")
+            time.sleep(BACKFILL_LEASE_POLL_SECONDS)
+            done = completed_windows(source)
+            todo = [w for w in leased if (w[0], w[1]) not in done]
+
+    elapsed = max(time.monotonic() - started, 1e-9)
+    rows = totals["inserted"] + totals["updated"] + totals["skipped"]
+    print(f"{source} backfill finished in {elapsed:.1f}s: {totals['inserted']} inserted, "
+          f"{totals['updated']} updated, {totals['skipped']} skipped, "
+          f"{failed} windows failed ({rows / elapsed:.0f} rows/s).")
+    return totals
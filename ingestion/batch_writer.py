@@ -0,0 +1,98 @@
+# ingestion/batch_writer.py
+from sqlalchemy.exc import InterfaceError, OperationalError, SQLAlchemyError
+
+from . import metrics
+from .deadletters import dead_letter_rows, resolve
+from .loaders import add_counts, new_counts, normalize_gdacs_geometries, upsert_gdacs_events
+from .streaming import INGEST_BATCH_SIZE
+
+
+class BatchWriter:
+    """
+    Write rows through ``write(session, rows) -> counts`` in committed
+    batches of ``batch_size``, expunging the session after each so memory
+    stays flat.
+
+    When the database rejects a batch it is rolled back and split in half
+    until the offending rows are isolated; the good rows are committed and
+    each bad one is passed to ``on_error(row, error)`` and counted as
+    skipped. Connection failures are raised, since retrying row by row
+    cannot fix them.
+    """
+
+    def __init__(self, session, write, batch_size=INGEST_BATCH_SIZE, on_error=None, key=None):
+        self.session = session
+        self.write = write
+        self.batch_size = batch_size
+        self.on_error = on_error
+        self.key = key
+        self.counts = new_counts()
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.flush()
+
+    def add(self, row):
+        self._rows.append(row)
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+
+    def extend(self, rows):
+        for row in rows:
+            self.add(row)
+
+    def flush(self):
+        rows, self._rows = self._rows, []
+        if rows:
+            self._write(rows)
+        return self.counts
+
+    def _write(self, rows):
+        try:
+            with metrics.timed("db"):
+                counts = self.write(self.session, rows)
+                self.session.commit()
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            if isinstance(e, (OperationalError, InterfaceError)):
+                raise
+            if len(rows) > 1:
+                middle = len(rows) // 2
+                self._write(rows[:middle])
+                self._write(rows[middle:])
+                return
+            self._reject(rows[0], e)
+            return
+        finally:
+            self.session.expunge_all()
+        add_counts(self.counts, counts)
+
+    def _reject(self, row, error):
+        self.counts["skipped"] += 1
+        if self.on_error is not None:
+            self.on_error(row, error)
+        else:
+            label = row.get(self.key) if self.key else None
+            metrics.error(f"Failed to write row {label}: {error}")
+
+
+def gdacs_writer(session, source, model, features, batch_size=INGEST_BATCH_SIZE):
+    """
+    ``BatchWriter`` for GDACS rows built from ``{gdacs_id: feature}``. Each
+    committed batch also normalizes the geometries it wrote and drops the
+    dead letters of its events, and rows the database rejects are
+    dead-lettered with their raw feature.
+    """
+    def write(session, rows):
+        gdacs_ids = [row["gdacs_id"] for row in rows]
+        counts = upsert_gdacs_events(session, model, rows)
+        normalize_gdacs_geometries(session, model, gdacs_ids)
+        resolve(session, source, gdacs_ids)
+        return counts
+
+    return BatchWriter(session, write, batch_size,
+                       on_error=dead_letter_rows(session, source, features))
@@ -0,0 +1,257 @@
+# ingestion/bench.py
+"""
+Offline ingestion benchmark.
+
+    python -m app.bench record ARCHIVE_DIR --days 30
+    python -m app.bench replay ARCHIVE_DIR --loader orm --repeat 3
+    python -m app.bench decode ARCHIVE_DIR
+
+``record`` downloads a window of the USGS and GDACS feeds, plus every GDACS
+geometry they reference, into a compressed NDJSON archive. ``replay``
+serves that archive from a local HTTP server and runs the fetchers against
+it, so runs can be compared without depending on the live feeds. Replay
+into a scratch database: the first repeat measures a cold load, later ones
+the already-stored path. ``decode`` measures the parse cost per 10k
+features of the recorded feed bodies alone, dict walking against the typed
+decoders, without a database.
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from functools import partial
+from urllib.parse import urlsplit
+
+from geoalchemy2.elements import WKTElement
+
+from . import geometry_cache, http_client, metrics
+from .backfill import HISTORICAL_FETCHERS
+from .fetch_historical import iter_usgs_features, open_gdacs_stream
+from .fetch_realtime import (fetch_and_store_realtime_eq, fetch_and_store_realtime_fl,
+                             fetch_and_store_realtime_wf)
+from .decoders import decode_json, decode_usgs, earthquake_record
+from .geometry import iter_geometries
+from .loaders import earthquake_row
+from .matching import MATCH_MAX_TIME_DELTA, fetch_gdacs_earthquakes
+from .models import default_uuid
+from .replay import (FeedArchive, FeedRecorder, ReplayServer, archive_files, entry_body,
+                     read_archive)
+from .streaming import iter_features
+
+SOURCES = ("EQ", "FL", "WF")
+MANIFEST = "manifest.json"
+
+COLUMNS = ["source", "features", "features_per_sec", "wall_ms",
+           "http_requests", "http_bytes", "http_ms", "parse_ms", "db_ms", "errors"]
+
+
+def record(directory, starttime, endtime, sources=SOURCES):
+    # Bypass the geometry cache so every geometry lands in the archive.
+    geometry_cache.GEOMETRY_CACHE_DIR = ""
+    http_client.recorder = FeedRecorder(directory)
+    try:
+        for source in sources:
+            if source == "EQ":
+                features = list(iter_usgs_features(starttime, endtime))
+            else:
+                response = open_gdacs_stream(source, starttime, endtime)
+                if response is None:
+                    continue
+                try:
+                    features = list(iter_features(response))
+                finally:
+                    response.close()
+
+            if source == "EQ":
+                # The GDACS EQ list the matcher asks for after loading.
+                fetch_gdacs_earthquakes(starttime - MATCH_MAX_TIME_DELTA,
+                                        endtime + MATCH_MAX_TIME_DELTA)
+            else:
+                for _, _, error in iter_geometries(features):
+                    if error is not None:
+                        print(f"Failed to fetch geometry data: {error}")
+            print(f"Recorded {len(features)} {source} features.")
+    finally:
+        print(f"{http_client.recorder.count} responses written to "
+              f"{http_client.recorder.path}")
+        http_client.recorder.close()
+        http_client.recorder = None
+
+    with open(os.path.join(directory, MANIFEST), "w") as f:
+        json.dump({"starttime": starttime.isoformat(),
+                   "endtime": endtime.isoformat(),
+                   "sources": list(sources)}, f)
+
+
+def replay_fetchers(mode, loader, starttime, endtime):
+    if mode == "realtime":
+        # Realtime queries carry the current time, so the archive answers
+        # them with the responses recorded for the same endpoint.
+        interval = int((endtime - starttime).total_seconds())
+        return {
+            "EQ": partial(fetch_and_store_realtime_eq, interval),
+            "FL": fetch_and_store_realtime_fl,
+            "WF": fetch_and_store_realtime_wf,
+        }
+    return {source: partial(fetch, starttime, endtime)
+            for source, fetch in HISTORICAL_FETCHERS[loader].items()}
+
+
+def replay(directory, mode="historical", loader="orm", repeat=1, sources=None):
+    with open(os.path.join(directory, MANIFEST)) as f:
+        manifest = json.load(f)
+    starttime = datetime.fromisoformat(manifest["starttime"])
+    endtime = datetime.fromisoformat(manifest["endtime"])
+    sources = sources or manifest["sources"]
+
+    archive = FeedArchive.load(directory)
+    print(f"Loaded {archive.count} recorded responses from {directory}")
+
+    geometry_cache.GEOMETRY_CACHE_DIR = ""
+    fetchers = replay_fetchers(mode, loader, starttime, endtime)
+    results = []
+    with ReplayServer(archive) as server:
+        http_client.replay_url = server.url
+        try:
+            for source in sources:
+                for _ in range(repeat):
+                    with metrics.track(source) as stats:
+                        ok = fetchers[source]() is not None
+                    results.append(dict(stats.as_dict(), ok=ok))
+        finally:
+            http_client.replay_url = None
+    return results
+
+
+def _wkt_row(feature):
+    # earthquake_row as it was before the typed decoders: WKT epicenters.
+    props = feature["properties"]
+    coords = feature["geometry"]["coordinates"]
+    if props["mag"] is None:
+        return None
+    return {
+        "earthquake_id": default_uuid(),
+        "usgs_id": feature["id"],
+        "magnitude": props["mag"],
+        "depth_km": coords[2] if len(coords) > 2 else None,
+        "epicenter": WKTElement(f"POINT({coords[0]} {coords[1]})", srid=4326),
+        "reported_at": datetime.fromtimestamp(props["time"] / 1000.0),
+        "source": "USGS",
+        "title": props.get("title", ""),
+    }
+
+
+# Ways of turning a recorded body into rows (USGS) or features (GDACS).
+DECODERS = {
+    "usgs": {
+        "json+wkt": lambda body: [_wkt_row(f) for f in json.loads(body)["features"]],
+        "json+ewkb": lambda body: [earthquake_row(f) for f in json.loads(body)["features"]],
+        "msgspec": lambda body: [earthquake_record(f) for f in decode_usgs(body).features],
+    },
+    "gdacs": {
+        "json": lambda body: json.loads(body).get("features", []),
+        "msgspec": lambda body: decode_json(body).get("features", []),
+    },
+}
+
+
+def _feed(entry):
+    if entry["status"] != 200:
+        return None
+    parts = urlsplit(entry["url"])
+    if parts.path.endswith(("/query", ".geojson")) and "usgs" in parts.netloc:
+        return "usgs"
+    if parts.path.endswith("/geteventlist/search"):
+        return "gdacs"
+    return None
+
+
+def decode_benchmark(directory, repeat=5):
+    """
+    Best-of-``repeat`` time to decode every recorded USGS and GDACS feed
+    body into rows or features, per 10k features, for each decoder.
+    """
+    bodies = {feed: [] for feed in DECODERS}
+    for entry in read_archive(archive_files(directory)):
+        feed = _feed(entry)
+        if feed is not None:
+            bodies[feed].append(entry_body(entry))
+
+    results = []
+    for feed, decoders in DECODERS.items():
+        if not bodies[feed]:
+            continue
+        features = sum(len(decode_json(body).get("features", [])) for body in bodies[feed])
+        for name, decode in decoders.items():
+            best = float("inf")
+            for _ in range(repeat):
+                started = time.perf_counter()
+                for body in bodies[feed]:
+                    decode(body)
+                best = min(best, time.perf_counter() - started)
+            results.append({
+                "feed": feed,
+                "decoder": name,
+                "features": features,
+                "ms_per_10k": round(best * 1000.0 * 10000 / max(features, 1), 1),
+            })
+    return results
+
+
+def print_table(results, columns):
+    rows = [[str(result[column]) for column in columns] for result in results]
+    widths = [max(len(column), *(len(row[i]) for row in rows))
+              for i, column in enumerate(columns)]
+    print("  ".join(column.rjust(width) for column, width in zip(columns, widths)))
+    for row, result in zip(rows, results):
+        line = "  ".join(value.rjust(width) for value, width in zip(row, widths))
+        print(line if result.get("ok", True) else line + "  (failed)")
+
+
+def print_results(results):
+    print_table(results, COLUMNS)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.bench")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="archive a window of the live feeds")
+    record_parser.add_argument("archive")
+    record_parser.add_argument("--days", type=float, default=30)
+    record_parser.add_argument("--sources", nargs="+", choices=SOURCES, default=list(SOURCES))
+
+    replay_parser = commands.add_parser("replay", help="run the fetchers against an archive")
+    replay_parser.add_argument("archive")
+    replay_parser.add_argument("--mode", choices=("historical", "realtime"), default="historical")
+    replay_parser.add_argument("--loader", choices=sorted(HISTORICAL_FETCHERS), default="orm")
+    replay_parser.add_argument("--repeat", type=int, default=1)
+    replay_parser.add_argument("--sources", nargs="+", choices=SOURCES)
+    replay_parser.add_argument("--json", help="also write the results to this file")
+
+    decode_parser = commands.add_parser("decode", help="time feed parsing per 10k features")
+    decode_parser.add_argument("archive")
+    decode_parser.add_argument("--repeat", type=int, default=5)
+    decode_parser.add_argument("--json", help="also write the results to this file")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        endtime = datetime.utcnow()
+        record(args.archive, endtime - timedelta(days=args.days), endtime, args.sources)
+        return
+
+    if args.command == "decode":
+        results = decode_benchmark(args.archive, args.repeat)
+        print_table(results, ["feed", "decoder", "features", "ms_per_10k"])
+    else:
+        results = replay(args.archive, args.mode, args.loader, args.repeat, args.sources)
+        print_results(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
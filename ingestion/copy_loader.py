@@ -0,0 +1,250 @@
+# ingestion/copy_loader.py
+import io
+import time
+from datetime import datetime
+
+import requests
+import shapely
+from shapely.geometry import shape
+
+from .fetch_historical import SessionLocal, engine, iter_usgs_features, open_gdacs_stream
+from .geometry import iter_geometries
+from . import metrics
+from .decoders import point_ewkb
+from .deadletters import MissingGeometry, record_failure
+from .loaders import (GDACS_DERIVED_COLUMNS, GDACS_UPDATE_COLUMNS, gdacs_fingerprint,
+                      normalize_gdacs_geometries)
+from .matching import match_earthquakes_safely
+from .models import (Flood, Wildfire, default_uuid, ensure_multipolygon,
+                     map_severity_level_fl, map_severity_level_wf)
+from .streaming import iter_features
+
+EARTHQUAKE_COLUMNS = ["earthquake_id", "usgs_id", "magnitude", "depth_km",
+                      "epicenter", "reported_at", "source", "title"]
+FLOOD_COLUMNS = ["flood_id", "gdacs_id", "severity_level", "epicenter",
+                 "affected_area", "reported_at", "source", "title",
+                 "source_fingerprint"]
+WILDFIRE_COLUMNS = ["wildfire_id", "gdacs_id", "severity_level", "epicenter",
+                    "affected_area", "reported_at", "source", "title",
+                    "source_fingerprint"]
+
+
+def ewkb(geom):
+    """Hex EWKB with SRID 4326, which PostGIS accepts as geometry text input."""
+    return shapely.to_wkb(shapely.set_srid(geom, 4326), hex=True, include_srid=True)
+
+
+def _copy_value(value):
+    if value is None:
+        return "\\N"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+class _RowStream(io.TextIOBase):
+    """
+    File-like view over an iterator of rows in COPY text format, so COPY can
+    pull rows as they are produced instead of from a prebuilt buffer.
+    """
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._buffer = ""
+        self.count = 0
+        # Time spent producing rows, so COPY time can be split from it.
+        self.produce_seconds = 0.0
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        started = time.monotonic()
+        while size < 0 or len(self._buffer) < size:
+            try:
+                row = next(self._rows)
+            except StopIteration:
+                break
+            self.count += 1
+            self._buffer += "\t".join(_copy_value(v) for v in row) + "\n"
+        self.produce_seconds += time.monotonic() - started
+
+        if size < 0:
+            size = len(self._buffer)
+        chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+
+    readline = read
+
+
+def earthquake_copy_rows(features):
+    for feature in features:
+        props = feature["properties"]
+        coords = feature["geometry"]["coordinates"]
+        if props["mag"] is None:
+            continue
+        yield (
+            default_uuid(),
+            feature["id"],
+            props["mag"],
+            coords[2] if len(coords) > 2 else None,
+            point_ewkb(coords[0], coords[1]).hex(),
+            datetime.fromtimestamp(props["time"] / 1000.0),
+            "USGS",
+            props.get("title", ""),
+        )
+
+
+def gdacs_copy_rows(features, map_severity, failures):
+    """
+    COPY rows for GDACS features. Features that cannot be loaded are
+    appended to ``failures`` as ``(feature, error)`` for dead-lettering.
+    """
+    for feature, geom_poly, error in iter_geometries(features):
+        props = feature.get("properties", {})
+        if error is not None:
+            metrics.error(f"Failed to fetch geometry data: {error}")
+            failures.append((feature, error))
+            continue
+        if geom_poly is None:
+            failures.append((feature, MissingGeometry(
+                f"No affected area for event {props.get('eventid')}")))
+            continue
+        try:
+            coords = feature["geometry"]["coordinates"]
+            yield (
+                default_uuid(),
+                str(props.get("eventid")),
+                map_severity(props["severitydata"]["severity"]).name,
+                point_ewkb(coords[0], coords[1]).hex(),
+                ewkb(ensure_multipolygon(shape(geom_poly))),
+                datetime.fromisoformat(props["fromdate"]),
+                "GDACS",
+                props.get("htmldescription", ""),
+                gdacs_fingerprint(feature),
+            )
+        except Exception as e:
+            metrics.error(f"Failed to process event {props.get('eventid')}: {e}")
+            failures.append((feature, e))
+
+
+def copy_merge(table, columns, key, rows, update_columns=None):
+    """
+    Stream ``rows`` into a temporary staging table with COPY, then merge them
+    into ``table`` with one ``INSERT ... SELECT ... ON CONFLICT (key)``.
+    With ``update_columns`` set, stored rows whose ``source_fingerprint``
+    differs are updated; otherwise they are left alone.
+    Returns the inserted/updated/skipped counts.
+    """
+    started = time.monotonic()
+    staging = f"staging_{table}"
+    column_list = ", ".join(columns)
+
+    if update_columns:
+        assignments = ", ".join(
+            f"{col} = EXCLUDED.{col}" for col in update_columns)
+        conflict = (f"DO UPDATE SET {assignments} WHERE "
+                    f"{table}.source_fingerprint IS DISTINCT FROM EXCLUDED.source_fingerprint")
+    else:
+        conflict = "DO NOTHING"
+
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(
+            f"CREATE TEMP TABLE {staging} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP")
+
+        stream = _RowStream(rows)
+        cursor.copy_expert(
+            f"COPY {staging} ({column_list}) FROM STDIN", stream)
+        copied_at = time.monotonic()
+
+        # DISTINCT ON keeps duplicates within the load from hitting the same
+        # target row twice in one statement. xmax is 0 only for new tuples.
+        cursor.execute(
+            f"INSERT INTO {table} ({column_list}) "
+            f"SELECT DISTINCT ON ({key}) {column_list} FROM {staging} ORDER BY {key} "
+            f"ON CONFLICT ({key}) {conflict} RETURNING (xmax = 0)")
+        flags = [inserted for (inserted,) in cursor.fetchall()]
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+    finished = time.monotonic()
+    metrics.add(
+        features=stream.count,
+        parse_ms=stream.produce_seconds * 1000.0,
+        db_ms=(finished - started - stream.produce_seconds) * 1000.0)
+
+    inserted = sum(1 for flag in flags if flag)
+    report = {
+        "inserted": inserted,
+        "updated": len(flags) - inserted,
+        "skipped": stream.count - len(flags),
+    }
+
+    elapsed = max(finished - started, 1e-9)
+    print(f"COPY {table}: {stream.count} rows staged in {copied_at - started:.2f}s, "
+          f"{len(flags)} merged in {finished - copied_at:.2f}s "
+          f"({stream.count / elapsed:.0f} rows/s)")
+    return report
+
+
+def copy_load_historical_eq(starttime, endtime):
+    try:
+        counts = copy_merge("earthquakes", EARTHQUAKE_COLUMNS, "usgs_id",
+                            earthquake_copy_rows(iter_usgs_features(starttime, endtime)))
+    except requests.RequestException as e:
+        metrics.error(f"Failed to fetch data: {e}")
+        return None
+
+    session = SessionLocal()
+    try:
+        match_earthquakes_safely(session, starttime, endtime)
+    finally:
+        session.close()
+    return counts
+
+
+def _copy_load_historical_gdacs(eventlist, model, columns, map_severity, starttime, endtime):
+    response = open_gdacs_stream(eventlist, starttime, endtime)
+    if response is None:
+        return None
+
+    failures = []
+    try:
+        # Staged rows carry no derived columns, so updating them from the
+        # staging table clears them on every revised event.
+        counts = copy_merge(model.__tablename__, columns, "gdacs_id",
+                            gdacs_copy_rows(iter_features(response), map_severity, failures),
+                            GDACS_UPDATE_COLUMNS + GDACS_DERIVED_COLUMNS)
+    finally:
+        response.close()
+
+    session = SessionLocal()
+    try:
+        with metrics.timed("db"):
+            normalize_gdacs_geometries(session, model)
+            session.commit()
+        for feature, error in failures:
+            record_failure(session, eventlist,
+                           feature.get("properties", {}).get("eventid"), feature, error)
+        session.commit()
+    finally:
+        session.close()
+    counts["skipped"] += len(failures)
+    return counts
+
+
+def copy_load_historical_fl(starttime, endtime):
+    return _copy_load_historical_gdacs("FL", Flood, FLOOD_COLUMNS,
+                                       map_severity_level_fl, starttime, endtime)
+
+
+def copy_load_historical_wf(starttime, endtime):
+    return _copy_load_historical_gdacs("WF", Wildfire, WILDFIRE_COLUMNS,
+                                       map_severity_level_wf, starttime, endtime)
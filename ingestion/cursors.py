@@ -0,0 +1,51 @@
+# ingestion/cursors.py
+from datetime import datetime
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+
+from .models import IngestionCursor
+
+
+def get_cursor(session, source):
+    """Return the high-water mark recorded for ``source``, or None."""
+    cursor = session.get(IngestionCursor, source)
+    return cursor.position if cursor else None
+
+
+def advance_cursor(session, source, position):
+    """
+    Move the high-water mark of ``source`` forward to ``position``. The
+    cursor never moves backwards. The caller owns the transaction, so the
+    cursor commits together with the rows it covers.
+    """
+    if position is None:
+        return
+
+    stmt = insert(IngestionCursor).values(
+        source=source,
+        position=position,
+        updated_at=datetime.utcnow(),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[IngestionCursor.source],
+        set_={
+            "position": func.greatest(IngestionCursor.position, stmt.excluded.position),
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+    session.execute(stmt)
+
+
+def latest_usgs_update(features):
+    """Latest ``properties.updated`` (UTC) across decoded USGS features, or None."""
+    updated = [f.properties.updated for f in features
+               if f.properties.updated is not None]
+    return datetime.utcfromtimestamp(max(updated) / 1000.0) if updated else None
+
+
+def latest_gdacs_fromdate(features):
+    """Latest ``properties.fromdate`` across GDACS features, or None."""
+    dates = [f.get("properties", {}).get("fromdate") for f in features]
+    dates = [datetime.fromisoformat(d) for d in dates if d]
+    return max(dates) if dates else None
@@ -0,0 +1,105 @@
+# ingestion/deadletters.py
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, delete, func, or_, select
+from sqlalchemy.dialects.postgresql import insert
+
+from . import metrics
+from .models import DeadLetter
+
+# Retry delay after the first failure, doubled with each further attempt.
+DEADLETTER_BACKOFF_SECONDS = int(os.getenv("DEADLETTER_BACKOFF_SECONDS", "300"))
+DEADLETTER_MAX_BACKOFF_SECONDS = int(
+    os.getenv("DEADLETTER_MAX_BACKOFF_SECONDS", str(24 * 3600)))
+# After this many failed attempts an event is parked until someone looks at it.
+DEADLETTER_MAX_ATTEMPTS = int(os.getenv("DEADLETTER_MAX_ATTEMPTS", "8"))
+
+
+class MissingGeometry(ValueError):
+    """The GDACS geometry response holds no affected-area polygon."""
+
+
+def record_failure(session, source, event_id, payload, error):
+    """
+    Store a feature that failed to load, or bump the attempt count of one
+    already stored, and schedule its next retry. The caller commits.
+    """
+    now = datetime.utcnow()
+    stmt = insert(DeadLetter).values(
+        source=source,
+        event_id=str(event_id),
+        payload=payload,
+        error_class=type(error).__name__,
+        error_message=str(error),
+        attempts=1,
+        first_failed_at=now,
+        last_failed_at=now,
+        next_attempt_at=now + timedelta(seconds=DEADLETTER_BACKOFF_SECONDS),
+    )
+    attempts = DeadLetter.attempts + 1
+    backoff = func.least(DEADLETTER_BACKOFF_SECONDS * func.power(2, DeadLetter.attempts),
+                         DEADLETTER_MAX_BACKOFF_SECONDS)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DeadLetter.source, DeadLetter.event_id],
+        set_={
+            "payload": stmt.excluded.payload,
+            "error_class": stmt.excluded.error_class,
+            "error_message": stmt.excluded.error_message,
+            "attempts": attempts,
+            "last_failed_at": stmt.excluded.last_failed_at,
+            "next_attempt_at": case(
+                (attempts >= DEADLETTER_MAX_ATTEMPTS, None),
+                else_=stmt.excluded.last_failed_at + func.make_interval(
+                    0, 0, 0, 0, 0, 0, backoff)),
+        },
+    )
+    session.execute(stmt)
+
+
+def resolve(session, source, event_ids):
+    """Drop the dead letters of events that have now loaded."""
+    event_ids = [str(event_id) for event_id in event_ids]
+    if event_ids:
+        session.execute(delete(DeadLetter).where(
+            DeadLetter.source == source, DeadLetter.event_id.in_(event_ids)))
+
+
+def blocked_ids(session, source, features, fingerprint):
+    """
+    The ids of ``{event_id: feature}`` that failed before and are not yet
+    due for another attempt, so polls do not download their geometry every
+    cycle. A feature whose ``fingerprint`` differs from the dead-lettered
+    payload's is a new revision of the event and is never blocked.
+    """
+    if not features:
+        return set()
+    letters = session.execute(select(DeadLetter.event_id, DeadLetter.payload).where(
+        DeadLetter.source == source,
+        DeadLetter.event_id.in_([str(event_id) for event_id in features]),
+        or_(DeadLetter.next_attempt_at.is_(None),
+            DeadLetter.next_attempt_at > datetime.utcnow()),
+    )).all()
+    return {event_id for event_id, payload in letters
+            if fingerprint(payload) == fingerprint(features[event_id])}
+
+
+def due(session, source, limit=100):
+    """Dead letters of ``source`` whose next retry is due, oldest first."""
+    return session.scalars(select(DeadLetter).where(
+        DeadLetter.source == source,
+        DeadLetter.next_attempt_at <= datetime.utcnow(),
+    ).order_by(DeadLetter.next_attempt_at).limit(limit)).all()
+
+
+def dead_letter_rows(session, source, features):
+    """
+    ``BatchWriter`` error handler that dead-letters a GDACS row the database
+    rejected, keyed back to its raw feature in ``features``.
+    """
+    def on_error(row, error):
+        gdacs_id = row["gdacs_id"]
+        metrics.error(f"Failed to write {source} event {gdacs_id}: {error}")
+        record_failure(session, source, gdacs_id, features[gdacs_id], error)
+        session.commit()
+    return on_error
@@ -0,0 +1,92 @@
+# ingestion/decoders.py
+import struct
+from datetime import datetime
+from typing import List, Optional
+
+import msgspec
+from geoalchemy2.elements import WKBElement
+
+from .models import default_uuid
+
+# Little-endian EWKB header of a 2D point with an SRID.
+_EWKB_POINT = struct.Struct("<BIIdd")
+_EWKB_POINT_TYPE = 0x20000001
+
+
+def point_ewkb(lon, lat, srid=4326):
+    """EWKB of a point, packed directly instead of parsed from WKT."""
+    return _EWKB_POINT.pack(1, _EWKB_POINT_TYPE, srid, lon, lat)
+
+
+def point_element(lon, lat):
+    return WKBElement(point_ewkb(lon, lat), srid=4326, extended=True)
+
+
+class Point(msgspec.Struct):
+    coordinates: List[float]
+
+
+class UsgsProperties(msgspec.Struct):
+    time: int
+    mag: Optional[float] = None
+    updated: Optional[int] = None
+    title: Optional[str] = ""
+
+
+class UsgsFeature(msgspec.Struct):
+    id: str
+    properties: UsgsProperties
+    geometry: Point
+
+
+class UsgsMetadata(msgspec.Struct, frozen=True):
+    generated: Optional[int] = None
+
+
+class UsgsFeed(msgspec.Struct):
+    """A USGS GeoJSON response, from the query API or a summary feed."""
+    features: List[UsgsFeature] = []
+    metadata: UsgsMetadata = UsgsMetadata()
+
+
+_usgs_decoder = msgspec.json.Decoder(UsgsFeed)
+_decoder = msgspec.json.Decoder()
+
+
+def decode_usgs(body):
+    """
+    Decode and validate a USGS GeoJSON body. Raises ``ValueError`` (a
+    ``msgspec.DecodeError``) when it is not JSON or does not match the schema.
+    """
+    return _usgs_decoder.decode(body)
+
+
+def decode_json(body):
+    """
+    Decode a JSON body into plain dicts and lists. Used for GDACS, whose
+    features are validated event by event when their rows are built so that
+    one malformed event is dead-lettered instead of failing the whole list.
+    """
+    return _decoder.decode(body)
+
+
+def earthquake_record(feature):
+    """
+    ``earthquakes`` row for a decoded ``UsgsFeature``, or None when the quake
+    has no magnitude. Same columns as ``loaders.earthquake_row``.
+    """
+    props = feature.properties
+    if props.mag is None:
+        return None
+
+    coords = feature.geometry.coordinates
+    return {
+        "earthquake_id": default_uuid(),
+        "usgs_id": feature.id,
+        "magnitude": props.mag,
+        "depth_km": coords[2] if len(coords) > 2 else None,
+        "epicenter": point_element(coords[0], coords[1]),
+        "reported_at": datetime.fromtimestamp(props.time / 1000.0),
+        "source": "USGS",
+        "title": props.title,
+    }
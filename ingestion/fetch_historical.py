@@ -1,17 +1,20 @@
 # ingestion/fetch_historical.py
 from operator import ge
 import os
-from datetime import datetime
-from shapely.geometry import shape
-from geoalchemy2.shape import from_shape
+from functools import partial
+import requests
 from tqdm import tqdm
 
-import requests
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from geoalchemy2.elements import WKTElement
-from .models import Earthquake, Wildfire, default_uuid, Flood, map_severity_level_fl, ensure_multipolygon, map_severity_level_wf
-from .utils import find_matching_gdacs_event
+from .models import Wildfire, Flood, map_severity_level_fl, map_severity_level_wf
+from .batch_writer import BatchWriter, gdacs_writer
+from .loaders import (add_counts, build_gdacs_rows, changed_gdacs_features, earthquake_row,
+                      new_counts, upsert_earthquakes)
+from .streaming import batched, iter_features
+from .matching import match_earthquakes_safely
+from .regions import DEFAULT_REGION, fetch_tiles, region_tiles
+from . import http_client, metrics
 
 USGS_URL = "https://earthquake.usgs.gov/fdsnws/event/1/query"
 GDASC_URL = "https://www.gdacs.org/gdacsapi/api/events/geteventlist/search"
@@ -22,178 +25,142 @@ engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(bind=engine)
 
 
-def fetch_and_store_historical_eq(starttime, endtime):
+def open_usgs_stream(starttime, endtime, region=DEFAULT_REGION):
+    """Open a streamed USGS query for the window, or return None on failure."""
     params = {
         "format": "geojson",
         "starttime": starttime.isoformat(),
         "endtime": endtime.isoformat(),
-        "minlatitude": 23.5,
-        "maxlatitude": 37.0,
-        "minlongitude": 60.9,
-        "maxlongitude": 77.0,
+        **region.params(),
     }
 
-    response = requests.get(USGS_URL, params=params, timeout=60)
-    data = response.json()
-
-    session = SessionLocal()
-
-    for feature in tqdm(data["features"], desc="Processing Earthquake Features"):
-        props = feature["properties"]
-        coords = feature["geometry"]["coordinates"]
-
-        earthquake_id = default_uuid()
-        magnitude = props["mag"]
-        depth_km = coords[2] if len(coords) > 2 else None
-        epicenter = WKTElement(f"POINT({coords[0]} {coords[1]})", srid=4326)
-        reported_at = datetime.fromtimestamp(props["time"] / 1000.0)
-        source = "USGS"
-        usgs_id = feature["id"]
-
-        # Skip if magnitude is None
-        if magnitude is None:
-            continue
-
-        if session.query(Earthquake).filter_by(usgs_id=usgs_id).first():
-            continue
-
-        earthquake = Earthquake(
-            earthquake_id=earthquake_id,
-            magnitude=magnitude,
-            depth_km=depth_km,
-            epicenter=epicenter,
-            reported_at=reported_at,
-            source=source,
-            usgs_id=usgs_id,
-            title=props.get("title", "")
-        )
-
-        session.add(earthquake)
-
-    session.commit()
-    session.close()
-    print("Earthquake Historical ingestion complete.")
+    response = http_client.get(USGS_URL, params=params, timeout=60, stream=True)
+    if response.status_code != 200:
+        metrics.error(f"Failed to fetch data: {response.status_code}")
+        response.close()
+        return None
+    return response
 
 
-# Fetch and store historical flood data
-def fetch_and_store_historical_fl(starttime, endtime):
+def open_gdacs_stream(eventlist, starttime, endtime):
+    """Open a streamed GDACS event list for the window, or return None."""
     url = GDASC_URL
-    url += "?alertlevel=Green;Orange;Red&eventlist=FL"
+    url += f"?alertlevel=Green;Orange;Red&eventlist={eventlist}"
     if starttime:
         url += f"&fromdate={starttime}"
     if endtime:
         url += f"&todate={endtime}"
 
-    response = requests.get(url)
+    response = http_client.get(url, stream=True)
     if response.status_code != 200:
-        print(f"Failed to fetch data: {response.status_code}")
-        return
+        metrics.error(f"Failed to fetch data: {response.status_code}")
+        response.close()
+        return None
+    return response
 
-    data = response.json()
-    session = SessionLocal()
 
-    features = data.get("features", [])
-
-    for feature in tqdm(features, desc="Processing Flood Features"):
-        props = feature.get("properties", {})
-        if session.query(Flood).filter_by(gdacs_id=str(props.get("eventid"))).first():
-            continue
-        geom_url = props.get("url", {}).get("geometry", None)
-        try:
-            geom_poly = requests.get(
-                geom_url, timeout=60).json() if geom_url else None
-        except requests.RequestException as e:
-            print(f"Failed to fetch geometry data: {e}")
-            continue
-        geom_poly = geom_poly.get("features", None) if geom_poly else None
-        geom_poly = geom_poly[1].get("geometry", None) if geom_poly else None
-        affected_area = from_shape(
-            ensure_multipolygon(shape(geom_poly)), srid=4326)
-        epicenter = WKTElement(
-            f"POINT({feature['geometry']['coordinates'][0]} {feature['geometry']['coordinates'][1]})", srid=4326)
-
-        try:
-            flood = Flood(
-                gdacs_id=str(props.get("eventid")),
-                severity_level=map_severity_level_fl(
-                    props["severitydata"]["severity"]),
-                affected_area=affected_area,
-                reported_at=datetime.strptime(
-                    props["fromdate"], "%Y-%m-%dT%H:%M:%S"),
-                source="GDACS",
-                epicenter=epicenter,
-                title=props.get("htmldescription", ""),
-            )
-
-            session.add(flood)
-
-        except Exception as e:
-            print(f"Failed to process flood event {props.get('eventid')}: {e}")
+def _usgs_tile_features(starttime, endtime, tile):
+    response = open_usgs_stream(starttime, endtime, tile)
+    if response is None:
+        raise requests.HTTPError(f"USGS query failed for {tile.name}")
     try:
-        session.commit()
-        print("Flood Historical ingestion complete.")
-    except Exception as e:
-        session.rollback()
-        print(f"Failed to commit to DB: {e}")
+        yield from iter_features(response)
+    finally:
+        response.close()
 
 
-def fetch_and_store_historical_wf(starttime, endtime):
-    url = GDASC_URL
-    url += "?alertlevel=Green;Orange;Red&eventlist=WF"
-    if starttime:
-        url += f"&fromdate={starttime}"
-    if endtime:
-        url += f"&todate={endtime}"
+def iter_usgs_features(starttime, endtime, regions=None):
+    """
+    Features of every configured region for the window, with each region
+    queried tile by tile in parallel and repeats across tiles dropped.
+    """
+    return fetch_tiles(partial(_usgs_tile_features, starttime, endtime),
+                       region_tiles(regions))
 
-    response = requests.get(url)
-    if response.status_code != 200:
-        print(f"Failed to fetch data: {response.status_code}")
-        return
 
-    data = response.json()
+def fetch_and_store_historical_eq(starttime, endtime):
+    counts = new_counts()
     session = SessionLocal()
+    # Commits every batch and drops it from the identity map, so memory stays
+    # flat however large the window is.
+    writer = BatchWriter(session, upsert_earthquakes, key="usgs_id")
+    try:
+        features = tqdm(iter_usgs_features(starttime, endtime),
+                        desc="Processing Earthquake Features")
+        for batch in metrics.timed_iter(batched(features), "parse"):
+            metrics.add(features=len(batch))
+            with metrics.timed("parse"):
+                rows = [earthquake_row(feature) for feature in batch]
+            counts["skipped"] += rows.count(None)
+            writer.extend(row for row in rows if row is not None)
+        add_counts(counts, writer.flush())
+
+        # One GDACS request links every quake stored in the window.
+        match_earthquakes_safely(session, starttime, endtime)
+    except requests.RequestException as e:
+        session.rollback()
+        metrics.error(f"Failed to fetch data: {e}")
+        return None
+    finally:
+        session.close()
+
+    print(f"Earthquakes: {counts['inserted']} inserted, "
+          f"{counts['updated']} updated, {counts['skipped']} skipped.")
+    print("Earthquake Historical ingestion complete.")
+    return counts
+
+
+def _fetch_and_store_historical_gdacs(eventlist, model, map_severity, label, starttime, endtime):
+    response = open_gdacs_stream(eventlist, starttime, endtime)
+    if response is None:
+        return None
 
-    features = data.get("features", [])
-
-    for feature in tqdm(features, desc="Processing Wild Fire Features"):
-        props = feature.get("properties", {})
-        if session.query(Wildfire).filter_by(gdacs_id=str(props.get("eventid"))).first():
-            continue
-        geom_url = props.get("url", {}).get("geometry", None)
-        try:
-            geom_poly = requests.get(
-                geom_url, timeout=60).json() if geom_url else None
-        except requests.RequestException as e:
-            print(f"Failed to fetch geometry data: {e}")
-            continue
-        geom_poly = geom_poly.get("features", None) if geom_poly else None
-        geom_poly = geom_poly[1].get("geometry", None) if geom_poly else None
-        affected_area = from_shape(
-            ensure_multipolygon(shape(geom_poly)), srid=4326)
-        epicenter = WKTElement(
-            f"POINT({feature['geometry']['coordinates'][0]} {feature['geometry']['coordinates'][1]})", srid=4326)
-
-        try:
-            wild_fire = Wildfire(
-                gdacs_id=str(props.get("eventid")),
-                severity_level=map_severity_level_wf(
-                    props["severitydata"]["severity"]),
-                affected_area=affected_area,
-                reported_at=datetime.strptime(
-                    props["fromdate"], "%Y-%m-%dT%H:%M:%S"),
-                source="GDACS",
-                epicenter=epicenter,
-                title=props.get("htmldescription", ""),
-            )
-
-            session.add(wild_fire)
-
-        except Exception as e:
-            print(
-                f"Failed to process wild fire event {props.get('eventid')}: {e}")
+    counts = new_counts()
+    seen = set()
+    session = SessionLocal()
     try:
-        session.commit()
-        print("Wild Fire Historical ingestion complete.")
+        features = tqdm(iter_features(response),
+                        desc=f"Processing {label} Features")
+        for batch in metrics.timed_iter(batched(features), "parse"):
+            metrics.add(features=len(batch))
+            with metrics.timed("db"):
+                changed = changed_gdacs_features(session, model, batch)
+
+            pending = {}
+            for gdacs_id, feature in changed.items():
+                if gdacs_id in seen:
+                    continue
+                seen.add(gdacs_id)
+                pending[gdacs_id] = feature
+            counts["skipped"] += len(batch) - len(pending)
+
+            rows = build_gdacs_rows(session, eventlist, model, map_severity,
+                                    pending, counts, label.lower())
+            # Keep the dead letters even if the rows fail to write.
+            session.commit()
+
+            writer = gdacs_writer(session, eventlist, model, pending)
+            writer.extend(rows)
+            add_counts(counts, writer.flush())
+
+        print(f"{label} Historical ingestion complete.")
     except Exception as e:
         session.rollback()
-        print(f"Failed to commit to DB: {e}")
+        metrics.error(f"Failed to commit to DB: {e}")
+        return None
+    finally:
+        session.close()
+        response.close()
+
+    return counts
+
+
+# Fetch and store historical flood data
+def fetch_and_store_historical_fl(starttime, endtime):
+    return _fetch_and_store_historical_gdacs(
+        "FL", Flood, map_severity_level_fl, "Flood", starttime, endtime)
+
+
+def fetch_and_store_historical_wf(starttime, endtime):
+    return _fetch_and_store_historical_gdacs(
+        "WF", Wildfire, map_severity_level_wf, "Wild Fire", starttime, endtime)
@@ -0,0 +1,136 @@
+# ingestion/geometry.py
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+import requests
+
+from . import geometry_cache, http_client, metrics
+from .decoders import decode_json
+
+GEOMETRY_FETCH_WORKERS = int(os.getenv("GEOMETRY_FETCH_WORKERS", "16"))
+GEOMETRY_FETCH_PER_HOST = int(os.getenv("GEOMETRY_FETCH_PER_HOST", "4"))
+# Wall-clock budget for one geometry download, connect to last byte.
+GEOMETRY_FETCH_DEADLINE = float(os.getenv("GEOMETRY_FETCH_DEADLINE", "60"))
+
+_host_limits = {}
+_host_limits_lock = threading.Lock()
+
+
+class DeadlineExceeded(requests.RequestException):
+    pass
+
+
+def _host_limit(url):
+    host = urlparse(url).netloc
+    with _host_limits_lock:
+        if host not in _host_limits:
+            _host_limits[host] = threading.BoundedSemaphore(
+                GEOMETRY_FETCH_PER_HOST)
+        return _host_limits[host]
+
+
+def _set_read_timeout(response, seconds):
+    """
+    Lower the read timeout of a streamed response's socket. requests only
+    takes one timeout per request, so this reaches through urllib3 and
+    http.client; it does nothing if their internals differ.
+    """
+    fp = getattr(getattr(response.raw, "_fp", None), "fp", None)
+    sock = getattr(getattr(fp, "raw", None), "_sock", None)
+    if sock is not None:
+        sock.settimeout(max(seconds, 0.001))
+
+
+def get_with_deadline(url, deadline=GEOMETRY_FETCH_DEADLINE, headers=None):
+    """
+    GET ``url`` and return ``(status_code, headers, body)``, giving up once
+    ``deadline`` seconds have passed. Unlike the ``timeout`` argument of
+    requests, which applies to each socket read, this bounds the whole
+    download. There is a single attempt: a failed download is retried by
+    the dead-letter worker, with backoff, rather than within the deadline.
+    """
+    with _host_limit(url):
+        expires = time.monotonic() + deadline
+        response = http_client.get(
+            url, retry=False, stream=True, headers=headers,
+            timeout=(min(http_client.HTTP_CONNECT_TIMEOUT, deadline),
+                     max(expires - time.monotonic(), 0.001)))
+        try:
+            if response.status_code != 304:
+                response.raise_for_status()
+            chunks = []
+            with metrics.timed("http"):
+                for chunk in response.iter_content(chunk_size=65536):
+                    remaining = expires - time.monotonic()
+                    if remaining <= 0:
+                        raise DeadlineExceeded(
+                            f"Deadline of {deadline}s exceeded for {url}")
+                    # The next socket read may only wait for what is left.
+                    _set_read_timeout(response, remaining)
+                    chunks.append(chunk)
+        finally:
+            response.close()
+
+    body = b"".join(chunks)
+    metrics.add(http_bytes=len(body))
+    return response.status_code, response.headers, body
+
+
+def fetch_geometry(url, key=None):
+    """
+    Fetch a GDACS geometry document through the on-disk cache. Fresh entries
+    are served as is, stale ones are revalidated with a conditional GET.
+    """
+    cached = geometry_cache.load(key)
+    if cached is not None and cached.fresh:
+        return decode_json(cached.body)
+
+    headers = cached.validators() if cached is not None else None
+    status, response_headers, body = get_with_deadline(url, headers=headers)
+    if status == 304 and cached is not None:
+        geometry_cache.touch(key)
+        return decode_json(cached.body)
+
+    payload = decode_json(body)
+    geometry_cache.store(key, body, url, response_headers)
+    return payload
+
+
+def extract_affected_area(payload):
+    """Pick the affected-area polygon out of a GDACS geometry response."""
+    features = payload.get("features", None) if payload else None
+    return features[1].get("geometry", None) if features and len(features) > 1 else None
+
+
+def iter_geometries(features, workers=GEOMETRY_FETCH_WORKERS):
+    """
+    Download the ``url.geometry`` polygon of every GDACS feature concurrently.
+
+    Yields ``(feature, geometry, error)`` tuples in completion order, so the
+    caller can build and stage rows while slower downloads are still running.
+    ``geometry`` is None when the feature has no geometry URL or the response
+    holds no polygon; ``error`` is the exception raised by a failed download.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for feature in features:
+            geom_url = feature.get("properties", {}).get(
+                "url", {}).get("geometry", None)
+            if not geom_url:
+                yield feature, None, None
+                continue
+            key = geometry_cache.cache_key(feature)
+            # bind() so downloads count towards the caller's run metrics.
+            futures[pool.submit(metrics.bind(fetch_geometry), geom_url, key)] = feature
+
+        for future in as_completed(futures):
+            feature = futures[future]
+            try:
+                payload = future.result()
+            except (requests.RequestException, ValueError) as e:
+                yield feature, None, e
+                continue
+            yield feature, extract_affected_area(payload), None
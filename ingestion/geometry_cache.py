@@ -0,0 +1,161 @@
+# ingestion/geometry_cache.py
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+
+GEOMETRY_CACHE_DIR = os.getenv("GEOMETRY_CACHE_DIR", "/tmp/dms/geometry-cache")
+GEOMETRY_CACHE_MAX_BYTES = int(
+    os.getenv("GEOMETRY_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+# Entries younger than this are served without asking GDACS; older ones are
+# revalidated with If-None-Match / If-Modified-Since.
+GEOMETRY_CACHE_FRESH_SECONDS = int(
+    os.getenv("GEOMETRY_CACHE_FRESH_SECONDS", str(24 * 3600)))
+
+_evict_lock = threading.Lock()
+# Running estimate of the cache size so eviction only walks the directory
+# once the limit is crossed. None until the first store scans it.
+_cache_bytes = None
+
+
+class CachedGeometry:
+    def __init__(self, body, meta):
+        self.body = body
+        self.meta = meta
+
+    @property
+    def fresh(self):
+        return time.time() - self.meta.get("stored_at", 0) < GEOMETRY_CACHE_FRESH_SECONDS
+
+    def validators(self):
+        headers = {}
+        if self.meta.get("etag"):
+            headers["If-None-Match"] = self.meta["etag"]
+        if self.meta.get("last_modified"):
+            headers["If-Modified-Since"] = self.meta["last_modified"]
+        return headers
+
+
+def enabled():
+    return bool(GEOMETRY_CACHE_DIR)
+
+
+def cache_key(feature):
+    """Key a GDACS feature's geometry by event type, event id and episode."""
+    props = feature.get("properties", {})
+    if props.get("eventid") is None or props.get("episodeid") is None:
+        return None
+    raw = f"{props.get('eventtype')}:{props['eventid']}:{props['episodeid']}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _paths(key):
+    base = os.path.join(GEOMETRY_CACHE_DIR, key[:2], key)
+    return base + ".json.gz", base + ".meta.json"
+
+
+def load(key):
+    if not enabled() or key is None:
+        return None
+
+    body_path, meta_path = _paths(key)
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+        with gzip.open(body_path, "rb") as f:
+            body = f.read()
+    except (OSError, ValueError):
+        return None
+
+    # mtime doubles as the LRU clock.
+    now = time.time()
+    for path in (body_path, meta_path):
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+    return CachedGeometry(body, meta)
+
+
+def store(key, body, url, headers):
+    if not enabled() or key is None:
+        return
+
+    body_path, meta_path = _paths(key)
+    os.makedirs(os.path.dirname(body_path), exist_ok=True)
+
+    meta = {
+        "url": url,
+        "etag": headers.get("ETag"),
+        "last_modified": headers.get("Last-Modified"),
+        "stored_at": time.time(),
+    }
+
+    # Write to temp files and rename so concurrent readers never see a
+    # half-written entry.
+    suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+    with gzip.open(body_path + suffix, "wb") as f:
+        f.write(body)
+    with open(meta_path + suffix, "w") as f:
+        json.dump(meta, f)
+    os.replace(body_path + suffix, body_path)
+    os.replace(meta_path + suffix, meta_path)
+
+    global _cache_bytes
+    with _evict_lock:
+        if _cache_bytes is not None:
+            _cache_bytes += os.path.getsize(body_path) + \
+                os.path.getsize(meta_path)
+        over = _cache_bytes is None or _cache_bytes > GEOMETRY_CACHE_MAX_BYTES
+    if over:
+        evict()
+
+
+def touch(key):
+    """Mark a revalidated (304) entry as fresh again."""
+    cached = load(key)
+    if cached is None:
+        return
+    cached.meta["stored_at"] = time.time()
+    _, meta_path = _paths(key)
+    with open(meta_path, "w") as f:
+        json.dump(cached.meta, f)
+
+
+def evict(max_bytes=GEOMETRY_CACHE_MAX_BYTES):
+    """Delete least recently used entries until the cache fits ``max_bytes``."""
+    global _cache_bytes
+    with _evict_lock:
+        entries = {}
+        total = 0
+        for root, _, files in os.walk(GEOMETRY_CACHE_DIR):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                key = name.split(".", 1)[0]
+                size, mtime = entries.get(key, (0, stat.st_mtime))
+                entries[key] = (size + stat.st_size,
+                                min(mtime, stat.st_mtime))
+                total += stat.st_size
+
+        if total <= max_bytes:
+            _cache_bytes = total
+            return
+
+        for key, (size, _) in sorted(entries.items(), key=lambda e: e[1][1]):
+            for path in _paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
+            if total <= max_bytes:
+                break
+        _cache_bytes = total
@@ -0,0 +1,91 @@
+# ingestion/http_client.py
+import os
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from . import metrics
+from .replay import FeedRecorder
+
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "60"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.5"))
+# Number of hosts with a cached pool, and keep-alive connections per host.
+HTTP_POOL_HOSTS = int(os.getenv("HTTP_POOL_HOSTS", "10"))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "20"))
+# Archive every upstream response under this directory (see replay.py).
+FEED_RECORD_DIR = os.getenv("FEED_RECORD_DIR")
+# Send every request to a replay server instead of the real upstream.
+FEED_REPLAY_URL = os.getenv("FEED_REPLAY_URL")
+
+
+class PooledSession(requests.Session):
+    """A requests session that applies the default timeout to every call."""
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
+        return super().request(method, url, **kwargs)
+
+
+def build_session(retries=HTTP_RETRIES):
+    retry = Retry(
+        total=retries,
+        backoff_factor=HTTP_BACKOFF,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_HOSTS,
+                          pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+
+    session = PooledSession()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "Accept-Encoding": "gzip, deflate",
+        "User-Agent": "dms-ingestion",
+    })
+    return session
+
+
+# Shared by every thread; connections are reused across calls and sources.
+session = build_session()
+# For callers that enforce their own deadline: urllib3 retries and backoff
+# would run past it before the caller gets control back.
+single_attempt_session = build_session(retries=0)
+recorder = FeedRecorder(FEED_RECORD_DIR) if FEED_RECORD_DIR else None
+replay_url = FEED_REPLAY_URL
+
+
+def _replay_target(url):
+    parts = urlsplit(url)
+    target = f"{replay_url.rstrip('/')}/{parts.netloc}{parts.path}"
+    return f"{target}?{parts.query}" if parts.query else target
+
+
+def get(url, retry=True, **kwargs):
+    if recorder is not None or replay_url:
+        # Resolve params into the URL so recordings and replays key on the
+        # full request.
+        url = requests.Request("GET", url, params=kwargs.pop("params", None)).prepare().url
+    upstream = url
+    if replay_url:
+        url = _replay_target(url)
+
+    started = time.monotonic()
+    response = (session if retry else single_attempt_session).get(url, **kwargs)
+    if recorder is not None:
+        # Reads the whole body; streamed callers then iterate the cached copy.
+        recorder.record(upstream, response)
+
+    # Streamed bodies are counted by whoever reads them.
+    metrics.add(
+        http_requests=1,
+        http_ms=(time.monotonic() - started) * 1000.0,
+        http_bytes=0 if kwargs.get("stream") else len(response.content))
+    return response
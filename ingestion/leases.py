@@ -0,0 +1,121 @@
+# ingestion/leases.py
+import os
+import socket
+import threading
+
+from sqlalchemy import case, delete, func, or_
+from sqlalchemy.dialects.postgresql import insert
+
+from .fetch_realtime import SessionLocal
+from .loaders import new_counts
+from .models import WorkLease
+
+# Identifies this process in work_leases; must differ between workers.
+WORKER_ID = os.getenv("WORKER_ID") or f"{socket.gethostname()}:{os.getpid()}"
+LEASE_TTL_SECONDS = int(os.getenv("LEASE_TTL_SECONDS", "900"))
+
+
+def _db_now():
+    # Lease times come from the database clock so worker clock skew cannot
+    # make a live lease look expired.
+    return func.timezone("UTC", func.now())
+
+
+def acquire(unit_key, ttl=LEASE_TTL_SECONDS, owner=WORKER_ID):
+    """
+    Take or renew the lease on ``unit_key`` for ``ttl`` seconds. Succeeds
+    when the unit is free, already ours, or its lease expired. Returns
+    whether this worker now holds it.
+    """
+    now = _db_now()
+    stmt = insert(WorkLease).values(
+        unit_key=unit_key,
+        owner=owner,
+        acquired_at=now,
+        expires_at=now + func.make_interval(0, 0, 0, 0, 0, 0, ttl),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[WorkLease.unit_key],
+        set_={
+            "owner": stmt.excluded.owner,
+            "acquired_at": case((WorkLease.owner == stmt.excluded.owner, WorkLease.acquired_at),
+                                else_=stmt.excluded.acquired_at),
+            "expires_at": stmt.excluded.expires_at,
+        },
+        where=or_(WorkLease.owner == stmt.excluded.owner,
+                  WorkLease.expires_at < stmt.excluded.acquired_at),
+    ).returning(WorkLease.unit_key)
+
+    session = SessionLocal()
+    try:
+        held = session.execute(stmt).first() is not None
+        session.commit()
+        return held
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def release(unit_key, owner=WORKER_ID):
+    session = SessionLocal()
+    try:
+        session.execute(delete(WorkLease).where(
+            WorkLease.unit_key == unit_key, WorkLease.owner == owner))
+        session.commit()
+    finally:
+        session.close()
+
+
+class Lease:
+    """
+    Hold the lease on ``unit_key`` for the duration of a ``with`` block,
+    renewing it in the background so long units are not reclaimed while
+    they still run. ``held`` is False when another worker owns the unit.
+    """
+
+    def __init__(self, unit_key, ttl=LEASE_TTL_SECONDS):
+        self.unit_key = unit_key
+        self.ttl = ttl
+        self.held = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _heartbeat(self):
+        while not self._stop.wait(self.ttl / 3):
+            try:
+                if not acquire(self.unit_key, self.ttl):
+                    print(f"❌ Lost lease on {self.unit_key}")
+                    self.held = False
+                    return
+            except Exception as e:
+                print(f"❌ Failed to renew lease on {self.unit_key}: {e}")
+
+    def __enter__(self):
+        self.held = acquire(self.unit_key, self.ttl)
+        if self.held:
+            self._thread = threading.Thread(target=self._heartbeat, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self.held:
+            release(self.unit_key)
+
+
+def leased(unit_key, ttl, func):
+    """
+    Wrap a scheduled fetch so only the worker holding ``unit_key`` runs it.
+    The lease is renewed on every run rather than released, so the owner
+    keeps the source; other workers take it over once it has gone ``ttl``
+    seconds without a renewal.
+    """
+    def run(*args):
+        if not acquire(unit_key, ttl):
+            return new_counts()
+        return func(*args)
+    return run
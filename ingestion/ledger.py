@@ -0,0 +1,65 @@
+# ingestion/ledger.py
+from datetime import timedelta
+
+from . import metrics
+from .fetch_realtime import SessionLocal
+from .models import IngestionRun
+
+
+def record_run(stats, kind, counts, error=None):
+    """Write one ``ingestion_runs`` row from a finished run's metrics."""
+    succeeded = counts is not None and error is None
+    counts = counts or {}
+    session = SessionLocal()
+    try:
+        session.add(IngestionRun(
+            source=stats.source,
+            kind=kind,
+            window_start=stats.window_start,
+            window_end=stats.window_end,
+            started_at=stats.started_at,
+            finished_at=stats.started_at + timedelta(milliseconds=stats.wall_ms),
+            features=stats.features,
+            http_requests=stats.http_requests,
+            http_bytes=stats.http_bytes,
+            http_ms=stats.http_ms,
+            parse_ms=stats.parse_ms,
+            db_ms=stats.db_ms,
+            inserted=counts.get("inserted", 0),
+            updated=counts.get("updated", 0),
+            skipped=counts.get("skipped", 0),
+            errors=stats.errors + (1 if error else 0),
+            succeeded=succeeded,
+            last_error=error or stats.last_error,
+        ))
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        # The ledger must never fail the run it describes.
+        print(f"Failed to record {stats.source} run: {e}")
+    finally:
+        session.close()
+
+
+def run_recorded(source, kind, func, *args, window=None):
+    """
+    Call ``func(*args)`` under fresh run metrics and write the run to the
+    ledger, whether it returned counts, returned None or raised.
+    """
+    counts = error = None
+    with metrics.track(source) as stats:
+        if window is not None:
+            metrics.window(*window)
+        try:
+            counts = func(*args)
+            return counts
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            record_run(stats, kind, counts, error)
+
+
+def recorded(source, kind, func):
+    """Wrap ``func`` so that every call is written to the ledger."""
+    return lambda *args: run_recorded(source, kind, func, *args)
@@ -0,0 +1,275 @@
+# ingestion/loaders.py
+import hashlib
+import json
+from datetime import datetime
+
+from geoalchemy2 import Geography
+from geoalchemy2.shape import from_shape
+from shapely.geometry import shape
+from sqlalchemy import cast, func, literal_column, not_, or_, update
+from sqlalchemy.dialects.postgresql import insert
+
+from . import metrics
+from .decoders import point_element
+from .deadletters import MissingGeometry, blocked_ids, record_failure
+from .geometry import iter_geometries
+from .models import AFFECTED_AREA_LODS, Earthquake, default_uuid, ensure_multipolygon
+
+# Keeps each multi-row INSERT well below PostgreSQL's 65535 bind parameter cap.
+UPSERT_CHUNK_SIZE = 1000
+
+EARTHQUAKE_UPDATE_COLUMNS = ["magnitude", "depth_km",
+                             "epicenter", "reported_at", "title"]
+
+
+def new_counts():
+    return {"inserted": 0, "updated": 0, "skipped": 0}
+
+
+def add_counts(total, counts):
+    for key, value in counts.items():
+        total[key] = total.get(key, 0) + value
+    return total
+
+
+def earthquake_row(feature):
+    """
+    Map a USGS GeoJSON feature to an ``earthquakes`` row, or None when the
+    feature has no magnitude.
+    """
+    props = feature["properties"]
+    coords = feature["geometry"]["coordinates"]
+
+    if props["mag"] is None:
+        return None
+
+    return {
+        "earthquake_id": default_uuid(),
+        "usgs_id": feature["id"],
+        "magnitude": props["mag"],
+        "depth_km": coords[2] if len(coords) > 2 else None,
+        "epicenter": point_element(coords[0], coords[1]),
+        "reported_at": datetime.fromtimestamp(props["time"] / 1000.0),
+        "source": "USGS",
+        "title": props.get("title", ""),
+    }
+
+
+# GDACS properties that change when an event is revised. Together they form
+# the fingerprint stored with each flood/wildfire row.
+GDACS_FINGERPRINT_PROPERTIES = ["episodeid", "alertlevel", "alertscore",
+                                "severitydata", "fromdate", "todate",
+                                "htmldescription"]
+
+GDACS_UPDATE_COLUMNS = ["severity_level", "affected_area", "epicenter",
+                        "reported_at", "title", "source_fingerprint"]
+
+# Computed from affected_area by normalize_gdacs_geometries.
+GDACS_DERIVED_COLUMNS = ["bbox", "area_km2", "centroid",
+                         *(column for column, _ in AFFECTED_AREA_LODS.values())]
+
+
+def gdacs_fingerprint(feature):
+    props = feature.get("properties", {})
+    payload = {key: props.get(key) for key in GDACS_FINGERPRINT_PROPERTIES}
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def gdacs_row(model, map_severity, feature, geom_poly):
+    """
+    Build a ``floods``/``wildfires`` row from a GDACS event-list feature and
+    the affected-area polygon downloaded for it.
+    """
+    props = feature.get("properties", {})
+    coords = feature["geometry"]["coordinates"]
+    id_column = model.__mapper__.primary_key[0].name
+
+    return {
+        id_column: default_uuid(),
+        "gdacs_id": str(props.get("eventid")),
+        "severity_level": map_severity(props["severitydata"]["severity"]),
+        "affected_area": from_shape(
+            ensure_multipolygon(shape(geom_poly)), srid=4326),
+        "reported_at": datetime.fromisoformat(props["fromdate"]),
+        "source": "GDACS",
+        "epicenter": point_element(coords[0], coords[1]),
+        "title": props.get("htmldescription", ""),
+        "source_fingerprint": gdacs_fingerprint(feature),
+    }
+
+
+def build_gdacs_rows(session, source, model, map_severity, pending, counts, label):
+    """
+    Download the geometry of every ``{gdacs_id: feature}`` in ``pending``
+    and build its row. Features that fail are dead-lettered under ``source``
+    and counted as skipped; features dead-lettered earlier are skipped until
+    their retry is due, unless GDACS has revised them since. The caller
+    commits, then writes the rows through
+    ``batch_writer.gdacs_writer``, which drops the dead letters of rows that
+    load.
+    """
+    blocked = blocked_ids(session, source, pending, gdacs_fingerprint)
+    counts["skipped"] += len(blocked)
+
+    rows = []
+    features = [feature for gdacs_id, feature in pending.items()
+                if gdacs_id not in blocked]
+    for feature, geom_poly, error in iter_geometries(features):
+        gdacs_id = str(feature.get("properties", {}).get("eventid"))
+        if error is not None:
+            metrics.error(f"Failed to fetch geometry data: {error}")
+        elif geom_poly is None:
+            error = MissingGeometry(f"No affected area for event {gdacs_id}")
+        else:
+            try:
+                rows.append(gdacs_row(model, map_severity, feature, geom_poly))
+                continue
+            except Exception as e:
+                error = e
+                metrics.error(f"Failed to process {label} event {gdacs_id}: {e}")
+
+        counts["skipped"] += 1
+        record_failure(session, source, gdacs_id, feature, error)
+
+    return rows
+
+
+def _upsert(session, stmt, chunk, counts):
+    # xmax is 0 only for freshly inserted tuples.
+    stmt = stmt.returning(literal_column("(xmax = 0)").label("inserted"))
+    flags = [inserted for (inserted,) in session.execute(stmt)]
+
+    counts["inserted"] += sum(1 for inserted in flags if inserted)
+    counts["updated"] += sum(1 for inserted in flags if not inserted)
+    counts["skipped"] += len(chunk) - len(flags)
+
+
+def upsert_earthquakes(session, rows, update=False):
+    """
+    Load earthquake rows with multi-row ``INSERT ... ON CONFLICT (usgs_id)``.
+
+    With ``update=False`` existing quakes are left alone; with ``update=True``
+    they are overwritten, but only when one of the tracked columns changed.
+    Returns a dict with the number of rows inserted, updated and skipped.
+    The caller owns the transaction.
+    """
+    counts = new_counts()
+
+    # A single statement cannot touch the same row twice, so dedup the batch
+    # first and let the last copy of a quake win.
+    unique = {}
+    for row in rows:
+        unique[row["usgs_id"]] = row
+    counts["skipped"] += len(rows) - len(unique)
+
+    batch = list(unique.values())
+    for start in range(0, len(batch), UPSERT_CHUNK_SIZE):
+        chunk = batch[start:start + UPSERT_CHUNK_SIZE]
+
+        stmt = insert(Earthquake).values(chunk)
+        if update:
+            excluded = stmt.excluded
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Earthquake.usgs_id],
+                set_={col: excluded[col]
+                      for col in EARTHQUAKE_UPDATE_COLUMNS},
+                where=or_(*[
+                    getattr(Earthquake, col).is_distinct_from(excluded[col])
+                    for col in EARTHQUAKE_UPDATE_COLUMNS
+                ]),
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(
+                index_elements=[Earthquake.usgs_id])
+
+        _upsert(session, stmt, chunk, counts)
+
+    return counts
+
+
+def upsert_gdacs_events(session, model, rows):
+    """
+    Insert GDACS flood/wildfire rows, or update the stored event when its
+    source fingerprint changed. Returns inserted/updated/skipped counts.
+    """
+    counts = new_counts()
+
+    unique = {}
+    for row in rows:
+        unique[row["gdacs_id"]] = row
+    counts["skipped"] += len(rows) - len(unique)
+
+    batch = list(unique.values())
+    for start in range(0, len(batch), UPSERT_CHUNK_SIZE):
+        chunk = batch[start:start + UPSERT_CHUNK_SIZE]
+
+        stmt = insert(model).values(chunk)
+        excluded = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[model.gdacs_id],
+            set_={col: excluded[col] for col in GDACS_UPDATE_COLUMNS},
+            where=model.source_fingerprint.is_distinct_from(
+                excluded.source_fingerprint),
+        )
+        _upsert(session, stmt, chunk, counts)
+
+    return counts
+
+
+def stored_fingerprints(session, model, gdacs_ids):
+    """Map each stored id in ``gdacs_ids`` to its source fingerprint."""
+    gdacs_ids = list(set(gdacs_ids))
+    if not gdacs_ids:
+        return {}
+    rows = session.query(model.gdacs_id, model.source_fingerprint).filter(
+        model.gdacs_id.in_(gdacs_ids)).all()
+    return dict(rows)
+
+
+def changed_gdacs_features(session, model, features):
+    """
+    Keep the features that are new or whose fingerprint differs from the
+    stored one, deduplicated by event id. Unchanged events never reach the
+    geometry download.
+    """
+    stored = stored_fingerprints(session, model, [
+        str(feature.get("properties", {}).get("eventid")) for feature in features])
+
+    changed = {}
+    for feature in features:
+        gdacs_id = str(feature.get("properties", {}).get("eventid"))
+        if stored.get(gdacs_id) == gdacs_fingerprint(feature):
+            continue
+        changed[gdacs_id] = feature
+    return changed
+
+
+def normalize_gdacs_geometries(session, model, gdacs_ids=None):
+    """
+    Repair the stored affected areas of ``gdacs_ids`` with ``ST_MakeValid``
+    and compute their bbox, area, centroid and simplified levels of detail.
+    Without ids, every row whose derived columns are unset is normalized.
+    The caller commits.
+    """
+    if gdacs_ids is None:
+        scope = model.area_km2.is_(None)
+    else:
+        gdacs_ids = list(gdacs_ids)
+        if not gdacs_ids:
+            return
+        scope = model.gdacs_id.in_(gdacs_ids)
+
+    area = model.affected_area
+    # Repairing can split a polygon into a collection; keep its polygons.
+    session.execute(update(model).where(scope, not_(func.ST_IsValid(area))).values(
+        affected_area=func.ST_Multi(func.ST_CollectionExtract(func.ST_MakeValid(area), 3))))
+
+    derived = {
+        "bbox": func.ST_MakeEnvelope(func.ST_XMin(area), func.ST_YMin(area),
+                                     func.ST_XMax(area), func.ST_YMax(area), 4326),
+        "area_km2": func.ST_Area(cast(area, Geography(srid=4326))) / 1e6,
+        "centroid": func.ST_Centroid(area),
+    }
+    for column, tolerance in AFFECTED_AREA_LODS.values():
+        derived[column] = func.ST_Multi(func.ST_SimplifyPreserveTopology(area, tolerance))
+    session.execute(update(model).where(scope).values(**derived))
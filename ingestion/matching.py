@@ -0,0 +1,177 @@
+# ingestion/matching.py
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import requests
+from geoalchemy2.functions import ST_X, ST_Y
+from sqlalchemy import select, update
+
+from . import http_client, metrics
+from .decoders import decode_json
+from .models import Earthquake
+
+GDACS_EVENTS_URL = "https://www.gdacs.org/gdacsapi/api/events/geteventlist/search"
+
+# A USGS quake and a GDACS EQ event are the same earthquake when they are
+# this close in space, time and magnitude.
+MATCH_MAX_DISTANCE_KM = float(os.getenv("MATCH_MAX_DISTANCE_KM", "100"))
+MATCH_MAX_TIME_DELTA = timedelta(
+    hours=float(os.getenv("MATCH_MAX_TIME_DELTA_HOURS", "24")))
+MATCH_MAX_MAGNITUDE_DELTA = float(os.getenv("MATCH_MAX_MAGNITUDE_DELTA", "0.3"))
+# GDACS lists an event some time after USGS, so realtime runs keep retrying
+# unmatched quakes this far back.
+MATCH_LOOKBACK_HOURS = int(os.getenv("MATCH_LOOKBACK_HOURS", "48"))
+# ...but at most this often, however frequently quakes are polled.
+MATCH_RETRY_SECONDS = int(os.getenv("MATCH_RETRY_SECONDS", "300"))
+MATCH_CHUNK_SIZE = 1024
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def fetch_gdacs_earthquakes(starttime, endtime):
+    """GDACS EQ events listed between ``starttime`` and ``endtime``."""
+    url = (f"{GDACS_EVENTS_URL}?alertlevel=Green;Orange;Red&eventlist=EQ"
+           f"&fromdate={starttime}&todate={endtime}")
+    response = http_client.get(url, timeout=60)
+    if response.status_code != 200:
+        raise requests.HTTPError(
+            f"GDACS event list returned {response.status_code}", response=response)
+    return decode_json(response.content).get("features", [])
+
+
+def _event_arrays(events):
+    ids, lat, lon, t, mag = [], [], [], [], []
+    for event in events:
+        try:
+            props = event["properties"]
+            coords = event["geometry"]["coordinates"]
+            fromdate = datetime.fromisoformat(props["fromdate"])
+            magnitude = float(props["severitydata"]["severity"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        ids.append(str(props["eventid"]))
+        lat.append(coords[1])
+        lon.append(coords[0])
+        t.append(fromdate.timestamp())
+        mag.append(magnitude)
+
+    order = np.argsort(t, kind="stable")
+    return (np.asarray(ids, dtype=object)[order], np.asarray(lat, dtype=float)[order],
+            np.asarray(lon, dtype=float)[order], np.asarray(t, dtype=float)[order],
+            np.asarray(mag, dtype=float)[order])
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between broadcastable arrays of points."""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def match_arrays(quakes, events):
+    """
+    Pair quakes with GDACS events.
+
+    ``quakes`` and ``events`` are ``(ids, lat, lon, t, mag)`` arrays with
+    ``t`` in epoch seconds and ``events`` sorted by time. Each chunk of
+    quakes is compared only against the slice of events inside its time
+    range, so the work grows with the overlap rather than with the product
+    of both lists. Every quake and every event is used at most once,
+    closest pairs first. Returns ``[(quake_id, event_id, distance_km)]``.
+    """
+    q_ids, q_lat, q_lon, q_t, q_mag = quakes
+    e_ids, e_lat, e_lon, e_t, e_mag = events
+    if not len(q_ids) or not len(e_ids):
+        return []
+
+    window = MATCH_MAX_TIME_DELTA.total_seconds()
+    order = np.argsort(q_t, kind="stable")
+    candidates = []
+    for start in range(0, len(order), MATCH_CHUNK_SIZE):
+        chunk = order[start:start + MATCH_CHUNK_SIZE]
+        lo = np.searchsorted(e_t, q_t[chunk].min() - window, side="left")
+        hi = np.searchsorted(e_t, q_t[chunk].max() + window, side="right")
+        if lo == hi:
+            continue
+
+        distance = haversine_km(q_lat[chunk, None], q_lon[chunk, None],
+                                e_lat[None, lo:hi], e_lon[None, lo:hi])
+        ok = ((distance < MATCH_MAX_DISTANCE_KM)
+              & (np.abs(q_t[chunk, None] - e_t[None, lo:hi]) <= window)
+              & (np.abs(q_mag[chunk, None] - e_mag[None, lo:hi]) <= MATCH_MAX_MAGNITUDE_DELTA))
+        rows, cols = np.nonzero(ok)
+        candidates.extend(zip(distance[rows, cols], chunk[rows], cols + lo))
+
+    matches = []
+    used_quakes, used_events = set(), set()
+    for distance, q, e in sorted(candidates):
+        if q in used_quakes or e in used_events:
+            continue
+        used_quakes.add(q)
+        used_events.add(e)
+        matches.append((q_ids[q], e_ids[e], float(distance)))
+    return matches
+
+
+def match_earthquakes(session, starttime, endtime):
+    """
+    Link unmatched quakes reported between ``starttime`` and ``endtime`` to
+    their GDACS event, storing its id in ``Earthquake.gdacs_id`` and its
+    feature in ``Earthquake.gdacs_event``. GDACS is asked
+    once for the whole window. The caller commits. Returns the number of
+    quakes matched.
+    """
+    rows = session.execute(
+        select(Earthquake.earthquake_id, ST_Y(Earthquake.epicenter),
+               ST_X(Earthquake.epicenter), Earthquake.reported_at, Earthquake.magnitude)
+        .where(Earthquake.reported_at >= starttime,
+               Earthquake.reported_at <= endtime,
+               Earthquake.gdacs_id.is_(None))
+    ).all()
+    if not rows:
+        return 0
+
+    features = fetch_gdacs_earthquakes(
+        starttime - MATCH_MAX_TIME_DELTA, endtime + MATCH_MAX_TIME_DELTA)
+    events = _event_arrays(features)
+    if not len(events[0]):
+        return 0
+
+    ids, lat, lon, reported_at, mag = zip(*rows)
+    quakes = (np.asarray(ids, dtype=object), np.asarray(lat, dtype=float),
+              np.asarray(lon, dtype=float),
+              np.asarray([r.timestamp() for r in reported_at], dtype=float),
+              np.asarray(mag, dtype=float))
+    matches = match_arrays(quakes, events)
+    if not matches:
+        return 0
+
+    # gdacs_id is unique, so skip events an earlier run already assigned.
+    taken = set(session.scalars(
+        select(Earthquake.gdacs_id)
+        .where(Earthquake.gdacs_id.in_([event_id for _, event_id, _ in matches]))))
+    by_id = {str(feature["properties"]["eventid"]): feature for feature in features
+             if "eventid" in (feature.get("properties") or {})}
+    values = [{"earthquake_id": quake_id, "gdacs_id": event_id, "gdacs_event": by_id[event_id]}
+              for quake_id, event_id, _ in matches if event_id not in taken]
+    if values:
+        session.execute(update(Earthquake), values)
+    return len(values)
+
+
+def match_earthquakes_safely(session, starttime, endtime):
+    """
+    Run ``match_earthquakes`` and commit, printing instead of raising so a
+    GDACS outage never fails the USGS ingestion.
+    """
+    try:
+        matched = match_earthquakes(session, starttime, endtime)
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        metrics.error(f"Failed to match earthquakes with GDACS: {e}")
+        return None
+    print(f"Matched {matched} earthquakes with GDACS events.")
+    return matched
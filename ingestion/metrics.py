@@ -0,0 +1,132 @@
+# ingestion/metrics.py
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+_current = contextvars.ContextVar("ingestion_run_stats", default=None)
+
+
+class RunStats:
+    """
+    Counters for one ingestion run, split by stage. Worker threads add to
+    the same instance, so every update goes through a lock.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.started = time.monotonic()
+        self.started_at = datetime.utcnow()
+        self.finished = None
+        self.features = 0
+        self.http_requests = 0
+        self.http_bytes = 0
+        self.http_ms = 0.0
+        self.parse_ms = 0.0
+        self.db_ms = 0.0
+        self.errors = 0
+        self.last_error = None
+        self.window_start = None
+        self.window_end = None
+        self._lock = threading.Lock()
+
+    def add(self, **values):
+        with self._lock:
+            for name, value in values.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    @property
+    def wall_ms(self):
+        end = self.finished if self.finished is not None else time.monotonic()
+        return (end - self.started) * 1000.0
+
+    @property
+    def features_per_sec(self):
+        return self.features / max(self.wall_ms / 1000.0, 1e-9)
+
+    def as_dict(self):
+        return {
+            "source": self.source,
+            "features": self.features,
+            "features_per_sec": round(self.features_per_sec, 1),
+            "wall_ms": round(self.wall_ms, 1),
+            "http_requests": self.http_requests,
+            "http_bytes": self.http_bytes,
+            "http_ms": round(self.http_ms, 1),
+            "parse_ms": round(self.parse_ms, 1),
+            "db_ms": round(self.db_ms, 1),
+            "errors": self.errors,
+        }
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def track(source):
+    """Collect stage timings for everything run inside the block."""
+    stats = RunStats(source)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        stats.finished = time.monotonic()
+        _current.reset(token)
+
+
+def add(**values):
+    stats = _current.get()
+    if stats is not None:
+        stats.add(**values)
+
+
+def error(message):
+    """Print an ingestion error and count it against the current run."""
+    print(message)
+    stats = _current.get()
+    if stats is not None:
+        stats.add(errors=1)
+        stats.last_error = message
+
+
+def window(starttime, endtime):
+    """Record the time window the current run covers."""
+    stats = _current.get()
+    if stats is not None:
+        stats.window_start, stats.window_end = starttime, endtime
+
+
+@contextmanager
+def timed(stage):
+    """Add the time spent in the block to ``<stage>_ms`` of the current run."""
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        add(**{f"{stage}_ms": (time.monotonic() - started) * 1000.0})
+
+
+def timed_iter(iterable, stage):
+    """Yield from ``iterable``, charging the time spent producing each item to ``stage``."""
+    iterator = iter(iterable)
+    while True:
+        started = time.monotonic()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            add(**{f"{stage}_ms": (time.monotonic() - started) * 1000.0})
+        yield item
+
+
+def bind(func):
+    """
+    Wrap ``func`` so it runs in the caller's context. Thread pool workers
+    do not inherit context variables, so use this when submitting work that
+    should count towards the current run.
+    """
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(func, *args, **kwargs)
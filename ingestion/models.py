@@ -1,9 +1,9 @@
 from shapely.geometry import Polygon, MultiPolygon
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy import (Column, DateTime, Enum, Float,
-                        ForeignKey, Integer, String, Text)
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy import (BigInteger, Boolean, Column, DateTime, Enum, Float,
+                        ForeignKey, Index, Integer, String, Text, func)
 from geoalchemy2 import Geometry
 import uuid
 import time
@@ -25,6 +25,25 @@ def ensure_multipolygon(geom):
         raise TypeError(f"Expected Polygon or MultiPolygon, got {type(geom)}")
 
 
+# Simplified copies of each flood/wildfire affected area, by level of detail:
+# the column holding it and its simplification tolerance in degrees.
+AFFECTED_AREA_LODS = {
+    "medium": ("affected_area_medium", 0.01),
+    "low": ("affected_area_low", 0.05),
+}
+
+
+def affected_area_column(model, lod="full"):
+    """
+    The affected area of ``model`` at a level of detail, falling back to the
+    full polygon for rows whose simplified copies are not computed yet.
+    """
+    if lod == "full":
+        return model.affected_area
+    column, _ = AFFECTED_AREA_LODS[lod]
+    return func.coalesce(getattr(model, column), model.affected_area)
+
+
 Base = declarative_base()
 
 
@@ -52,11 +71,17 @@ class User(Base):
 
 class Earthquake(Base):
     __tablename__ = 'earthquakes'
+    # Keyset pagination of the API walks this index newest first.
+    __table_args__ = (
+        Index('ix_earthquakes_reported_at_id', 'reported_at', 'earthquake_id'),
+    )
 
     earthquake_id = Column(
         UUID(as_uuid=True), default=default_uuid, primary_key=True)
     usgs_id = Column(String, unique=True)
     gdacs_id = Column(String, unique=True, nullable=True)
+    # The matched GDACS event feature, as listed when the match was made.
+    gdacs_event = Column(JSONB)
     magnitude = Column(Float, nullable=False)
     depth_km = Column(Float)
     epicenter = Column(Geometry('POINT'), nullable=False)
@@ -74,6 +99,9 @@ class SeverityEnum(enum.Enum):
 
 class Flood(Base):
     __tablename__ = 'floods'
+    __table_args__ = (
+        Index('ix_floods_reported_at_id', 'reported_at', 'flood_id'),
+    )
 
     flood_id = Column(UUID(as_uuid=True),
                       default=default_uuid, primary_key=True)
@@ -84,10 +112,20 @@ class Flood(Base):
     reported_at = Column(DateTime, nullable=False)
     source = Column(String)
     title = Column(String)
+    source_fingerprint = Column(String)
+    # Derived from affected_area once it is stored and repaired.
+    bbox = Column(Geometry('POLYGON'))
+    area_km2 = Column(Float)
+    centroid = Column(Geometry('POINT'))
+    affected_area_medium = Column(Geometry('MULTIPOLYGON', spatial_index=False))
+    affected_area_low = Column(Geometry('MULTIPOLYGON', spatial_index=False))
 
 
 class Wildfire(Base):
     __tablename__ = 'wildfires'
+    __table_args__ = (
+        Index('ix_wildfires_reported_at_id', 'reported_at', 'wildfire_id'),
+    )
 
     wildfire_id = Column(UUID(as_uuid=True),
                          primary_key=True, default=default_uuid)
@@ -98,6 +136,97 @@ class Wildfire(Base):
     reported_at = Column(DateTime, nullable=False)
     source = Column(String)
     title = Column(String)
+    source_fingerprint = Column(String)
+    # Derived from affected_area once it is stored and repaired.
+    bbox = Column(Geometry('POLYGON'))
+    area_km2 = Column(Float)
+    centroid = Column(Geometry('POINT'))
+    affected_area_medium = Column(Geometry('MULTIPOLYGON', spatial_index=False))
+    affected_area_low = Column(Geometry('MULTIPOLYGON', spatial_index=False))
+
+
+class BackfillCheckpoint(Base):
+    __tablename__ = 'backfill_checkpoints'
+
+    source = Column(String, primary_key=True)
+    window_start = Column(DateTime, primary_key=True)
+    window_end = Column(DateTime, primary_key=True)
+    completed_at = Column(DateTime, nullable=False)
+
+
+class IngestionCursor(Base):
+    __tablename__ = 'ingestion_cursors'
+
+    source = Column(String, primary_key=True)
+    position = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+
+
+class IngestionRun(Base):
+    __tablename__ = 'ingestion_runs'
+    __table_args__ = (
+        Index('ix_ingestion_runs_source_finished_at', 'source', 'finished_at'),
+    )
+
+    run_id = Column(UUID(as_uuid=True), default=default_uuid, primary_key=True)
+    source = Column(String, nullable=False)
+    kind = Column(String, nullable=False)
+    window_start = Column(DateTime)
+    window_end = Column(DateTime)
+    started_at = Column(DateTime, nullable=False)
+    finished_at = Column(DateTime, nullable=False)
+    features = Column(Integer, nullable=False, default=0)
+    http_requests = Column(Integer, nullable=False, default=0)
+    http_bytes = Column(BigInteger, nullable=False, default=0)
+    http_ms = Column(Float, nullable=False, default=0)
+    parse_ms = Column(Float, nullable=False, default=0)
+    db_ms = Column(Float, nullable=False, default=0)
+    inserted = Column(Integer, nullable=False, default=0)
+    updated = Column(Integer, nullable=False, default=0)
+    skipped = Column(Integer, nullable=False, default=0)
+    errors = Column(Integer, nullable=False, default=0)
+    succeeded = Column(Boolean, nullable=False)
+    last_error = Column(Text)
+
+
+class DeadLetter(Base):
+    __tablename__ = 'dead_letters'
+    __table_args__ = (
+        Index('ix_dead_letters_next_attempt_at', 'next_attempt_at'),
+    )
+
+    source = Column(String, primary_key=True)
+    event_id = Column(String, primary_key=True)
+    payload = Column(JSONB, nullable=False)
+    error_class = Column(String, nullable=False)
+    error_message = Column(Text)
+    attempts = Column(Integer, nullable=False, default=1)
+    first_failed_at = Column(DateTime, nullable=False)
+    last_failed_at = Column(DateTime, nullable=False)
+    # NULL once the event has used up its attempts.
+    next_attempt_at = Column(DateTime)
+
+
+class WorkLease(Base):
+    __tablename__ = 'work_leases'
+
+    unit_key = Column(String, primary_key=True)
+    owner = Column(String, nullable=False)
+    acquired_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+
+# Tables whose writes bump their row in data_versions (see the trigger in
+# database.py), so that cached API responses built from them are dropped.
+VERSIONED_TABLES = ("earthquakes", "floods", "wildfires", "reports")
+
+
+class DataVersion(Base):
+    __tablename__ = 'data_versions'
+
+    table_name = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False)
 
 
 class DisasterTypeEnum(enum.Enum):
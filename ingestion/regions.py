@@ -0,0 +1,179 @@
+# ingestion/regions.py
+import json
+import math
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+
+from . import metrics
+
+# JSON list of regions, either in a file or inline. Each entry is "global"
+# or an object with a name and the USGS bounding box parameters, e.g.
+# {"name": "pakistan", "minlatitude": 23.5, "maxlatitude": 37.0,
+#  "minlongitude": 60.9, "maxlongitude": 77.0}
+REGIONS_FILE = os.getenv("REGIONS_FILE")
+REGIONS = os.getenv("REGIONS")
+# Regions larger than this many degrees on a side are queried as tiles, which
+# keeps each USGS query well under its 20000 event limit.
+REGION_TILE_DEGREES = float(os.getenv("REGION_TILE_DEGREES", "60"))
+REGION_FETCH_WORKERS = int(os.getenv("REGION_FETCH_WORKERS", "4"))
+# Features fetched by the tile workers but not yet consumed. Workers wait
+# when it is full, so memory stays flat however large a tile is.
+REGION_FETCH_BUFFER = int(os.getenv("REGION_FETCH_BUFFER", "1000"))
+
+# Queue marker of a finished tile.
+_TILE_DONE = object()
+
+
+class _TileFailed:
+    def __init__(self, error):
+        self.error = error
+
+
+class Region:
+    def __init__(self, name, minlatitude, maxlatitude, minlongitude, maxlongitude):
+        self.name = name
+        self.minlatitude = float(minlatitude)
+        self.maxlatitude = float(maxlatitude)
+        self.minlongitude = float(minlongitude)
+        self.maxlongitude = float(maxlongitude)
+
+    def __repr__(self):
+        return (f"Region({self.name!r}, lat {self.minlatitude}..{self.maxlatitude}, "
+                f"lon {self.minlongitude}..{self.maxlongitude})")
+
+    def params(self):
+        """Bounding box as USGS query parameters."""
+        return {
+            "minlatitude": self.minlatitude,
+            "maxlatitude": self.maxlatitude,
+            "minlongitude": self.minlongitude,
+            "maxlongitude": self.maxlongitude,
+        }
+
+    def contains(self, lat, lon):
+        return (self.minlatitude <= lat <= self.maxlatitude
+                and self.minlongitude <= lon <= self.maxlongitude)
+
+    def tiles(self, size=REGION_TILE_DEGREES):
+        """Split the region into tiles of at most ``size`` degrees a side."""
+        rows = max(1, math.ceil((self.maxlatitude - self.minlatitude) / size))
+        cols = max(1, math.ceil((self.maxlongitude - self.minlongitude) / size))
+        lat_step = (self.maxlatitude - self.minlatitude) / rows
+        lon_step = (self.maxlongitude - self.minlongitude) / cols
+
+        return [
+            Region(f"{self.name}[{row},{col}]",
+                   self.minlatitude + row * lat_step,
+                   self.minlatitude + (row + 1) * lat_step,
+                   self.minlongitude + col * lon_step,
+                   self.minlongitude + (col + 1) * lon_step)
+            for row in range(rows) for col in range(cols)
+        ]
+
+
+GLOBAL = Region("global", -90, 90, -180, 180)
+DEFAULT_REGION = Region("pakistan", 23.5, 37.0, 60.9, 77.0)
+
+
+def parse_regions(config):
+    regions = []
+    for entry in config:
+        if entry == "global":
+            regions.append(GLOBAL)
+        else:
+            regions.append(Region(**entry))
+    return regions
+
+
+def load_regions():
+    """Regions from ``REGIONS_FILE`` or ``REGIONS``, else the default bbox."""
+    if REGIONS_FILE:
+        with open(REGIONS_FILE) as f:
+            return parse_regions(json.load(f))
+    if REGIONS:
+        return parse_regions(json.loads(REGIONS))
+    return [DEFAULT_REGION]
+
+
+def in_regions(coordinates, regions):
+    """True when GeoJSON point ``coordinates`` lie inside any of ``regions``."""
+    lon, lat = coordinates[:2]
+    return any(region.contains(lat, lon) for region in regions)
+
+
+def region_tiles(regions=None):
+    regions = load_regions() if regions is None else regions
+    return [tile for region in regions for tile in region.tiles()]
+
+
+def fetch_tiles(fetch_tile, tiles, workers=REGION_FETCH_WORKERS, key=itemgetter("id"),
+                buffer=REGION_FETCH_BUFFER):
+    """
+    Yield the features returned by ``fetch_tile(tile)`` for every tile,
+    dropping repeats of the same feature id (``key(feature)``) from
+    overlapping tiles or regions. Tiles are fetched in parallel and their
+    features are passed on as they arrive, through a queue of at most
+    ``buffer`` features; a single tile is streamed as is. An exception from
+    any tile is raised to the caller.
+    """
+    seen = set()
+
+    def unseen(features):
+        for feature in features:
+            feature_id = key(feature)
+            if feature_id in seen:
+                continue
+            seen.add(feature_id)
+            yield feature
+
+    if len(tiles) == 1:
+        yield from unseen(fetch_tile(tiles[0]))
+        return
+
+    results = queue.Queue(maxsize=buffer)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                results.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def run(tile):
+        try:
+            for feature in fetch_tile(tile):
+                if stop.is_set():
+                    return
+                put(feature)
+        except Exception as e:
+            put(_TileFailed(e))
+        finally:
+            put(_TILE_DONE)
+
+    def received():
+        remaining = len(tiles)
+        while remaining:
+            item = results.get()
+            if item is _TILE_DONE:
+                remaining -= 1
+            elif isinstance(item, _TileFailed):
+                raise item.error
+            else:
+                yield item
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        try:
+            # A context per task: one context cannot be entered by two
+            # threads at once.
+            for tile in tiles:
+                pool.submit(metrics.bind(run), tile)
+            yield from unseen(received())
+        finally:
+            # Releases workers blocked on a full queue when the caller stops
+            # early or a tile failed.
+            stop.set()
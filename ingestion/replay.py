@@ -0,0 +1,193 @@
+# ingestion/replay.py
+import base64
+import glob
+import gzip
+import json
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+# Response headers worth keeping; everything else is transport detail.
+RECORDED_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+
+def request_key(host, path, query):
+    """Normalise a request so the same query matches however it was encoded."""
+    return f"{host}{path}?{urlencode(sorted(parse_qsl(query, keep_blank_values=True)))}"
+
+
+def archive_files(path):
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, "*.ndjson.gz")))
+    return [path]
+
+
+def read_archive(paths):
+    """Yield the recorded entries of every archive file in ``paths``."""
+    for path in paths:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def entry_body(entry):
+    if "body_b64" in entry:
+        return base64.b64decode(entry["body_b64"])
+    return entry.get("body", "").encode("utf-8")
+
+
+class FeedRecorder:
+    """
+    Append every upstream response to a gzip-compressed NDJSON archive, one
+    JSON object per line with the request URL, status, a few headers, the
+    body and the time it was received.
+    """
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        name = f"feeds-{datetime.utcnow():%Y%m%dT%H%M%S}-{os.getpid()}.ndjson.gz"
+        self.path = os.path.join(directory, name)
+        self._file = gzip.open(self.path, "at", encoding="utf-8")
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def record(self, url, response):
+        entry = {
+            "ts": datetime.utcnow().isoformat(),
+            "url": url,
+            "status": response.status_code,
+            "headers": {name: response.headers[name]
+                        for name in RECORDED_HEADERS if name in response.headers},
+        }
+        try:
+            entry["body"] = response.content.decode("utf-8")
+        except UnicodeDecodeError:
+            entry["body_b64"] = base64.b64encode(response.content).decode("ascii")
+
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self.count += 1
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class FeedArchive:
+    """
+    Recorded responses indexed by normalised request. Exact matches are
+    served in recorded order; requests that were never recorded verbatim
+    (realtime polls carry the current time in their query) fall back to
+    the responses recorded for the same host and path that share the most
+    query parameters with the request.
+    """
+
+    def __init__(self, paths):
+        self._exact = defaultdict(list)
+        self._by_path = defaultdict(list)
+        self._served = defaultdict(int)
+        self._lock = threading.Lock()
+        self.count = 0
+
+        for entry in read_archive(paths):
+            self.add(entry)
+
+    @classmethod
+    def load(cls, path):
+        return cls(archive_files(path))
+
+    def add(self, entry):
+        parts = urlsplit(entry["url"])
+        self._exact[request_key(parts.netloc, parts.path, parts.query)].append(entry)
+        self._by_path[parts.netloc + parts.path].append(entry)
+        self.count += 1
+
+    def _closest(self, host, path, query):
+        wanted = set(parse_qsl(query, keep_blank_values=True))
+        best, best_score = [], -1
+        for entry in self._by_path.get(host + path, []):
+            score = len(wanted & set(parse_qsl(urlsplit(entry["url"]).query,
+                                               keep_blank_values=True)))
+            if score > best_score:
+                best, best_score = [entry], score
+            elif score == best_score:
+                best.append(entry)
+        return best
+
+    def lookup(self, host, path, query):
+        key = request_key(host, path, query)
+        entries = self._exact.get(key)
+        if not entries:
+            entries = self._closest(host, path, query)
+            if not entries:
+                return None
+            key = request_key(host, path, urlsplit(entries[0]["url"]).query)
+        with self._lock:
+            index = self._served[key]
+            self._served[key] += 1
+        return entries[index % len(entries)]
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        # Requests arrive as /<upstream host><upstream path>?<query>.
+        parts = urlsplit(self.path)
+        host, _, path = parts.path.lstrip("/").partition("/")
+        entry = self.server.archive.lookup(host, "/" + path, parts.query)
+        if entry is None:
+            self.send_error(404, "Not in archive")
+            return
+
+        headers = entry.get("headers", {})
+        etag = headers.get("ETag")
+        if etag and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = entry_body(entry)
+
+        self.send_response(entry["status"])
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ReplayServer:
+    """
+    Local stand-in for USGS and GDACS that answers from a recorded archive.
+    Point ``http_client.replay_url`` at ``url`` to route requests here.
+    """
+
+    def __init__(self, archive, host="127.0.0.1", port=0):
+        self._server = ThreadingHTTPServer((host, port), _ReplayHandler)
+        self._server.daemon_threads = True
+        self._server.archive = archive
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,103 @@
+# ingestion/scheduler.py
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+
+
+class ScheduledSource:
+    """
+    A fetch function polled on its own cadence.
+
+    ``func`` is a blocking callable; it runs in a worker thread so a slow
+    source never holds up the others. A run that raises or returns None
+    counts as a failure and pushes the next run out with exponential backoff
+    up to ``max_backoff`` seconds. ``jitter`` is the fraction of ``interval``
+    added at random to each delay so sources do not stay in lockstep.
+    """
+
+    def __init__(self, name, func, interval, jitter=0.1, max_backoff=None):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        self.max_backoff = max_backoff or interval * 8
+
+        self.running = False
+        self.failures = 0
+        self.last_run_at = None
+        self.last_duration = None
+        self.last_error = None
+        self.next_run_at = None
+
+    def delay(self):
+        if self.failures:
+            delay = min(self.interval * 2 ** self.failures, self.max_backoff)
+        else:
+            delay = self.interval
+        return delay + random.uniform(0, self.jitter * self.interval)
+
+    def status(self):
+        return {
+            "running": self.running,
+            "failures": self.failures,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "last_duration_s": round(self.last_duration, 3) if self.last_duration is not None else None,
+            "last_error": self.last_error,
+            "next_run_at": self.next_run_at.isoformat() if self.next_run_at else None,
+        }
+
+
+class Scheduler:
+    def __init__(self, sources, status_interval=60):
+        self.sources = {source.name: source for source in sources}
+        self.status_interval = status_interval
+
+    def status(self):
+        return {name: source.status() for name, source in self.sources.items()}
+
+    async def _run_once(self, source):
+        source.running = True
+        source.last_run_at = datetime.utcnow()
+        started = time.monotonic()
+        try:
+            result = await asyncio.to_thread(source.func)
+            if result is None:
+                raise RuntimeError("fetch reported failure")
+            source.failures = 0
+            source.last_error = None
+        except Exception as e:
+            source.failures += 1
+            source.last_error = f"{type(e).__name__}: {e}"
+            print(f"❌ {source.name} ingestion failed "
+                  f"(attempt {source.failures}): {e}")
+        finally:
+            source.running = False
+            source.last_duration = time.monotonic() - started
+        return started
+
+    async def _loop(self, source):
+        # Each source is a single coroutine, so a run can never overlap the
+        # previous one. The next run is timed from when the last one started,
+        # so the period does not drift by the fetch time; ticks missed while
+        # a slow run was in progress are dropped rather than queued.
+        while True:
+            started = await self._run_once(source)
+            due = max(started + source.delay(), time.monotonic())
+            wait = due - time.monotonic()
+            source.next_run_at = datetime.utcnow() + timedelta(seconds=wait)
+            await asyncio.sleep(wait)
+
+    async def _report(self):
+        while True:
+            await asyncio.sleep(self.status_interval)
+            for name, status in self.status().items():
+                print(f"[scheduler] {name}: last run {status['last_run_at']} "
+                      f"({status['last_duration_s']}s), next run {status['next_run_at']}, "
+                      f"failures {status['failures']}")
+
+    async def run(self):
+        await asyncio.gather(
+            self._report(),
+            *(self._loop(source) for source in self.sources.values()),
+        )
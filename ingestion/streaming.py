@@ -0,0 +1,61 @@
+# ingestion/streaming.py
+import os
+from itertools import islice
+
+from . import metrics
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "500"))
+
+
+class _ContentReader:
+    """
+    File-like wrapper over ``response.iter_content``. Unlike ``response.raw``
+    it also works once the body has been read (e.g. by the feed recorder),
+    and it counts the bytes it hands to the parser.
+    """
+
+    def __init__(self, response, chunk_size=65536):
+        self._chunks = response.iter_content(chunk_size=chunk_size)
+        self._buffer = b""
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            metrics.add(http_bytes=len(chunk))
+            self._buffer += chunk
+
+        if size < 0:
+            size = len(self._buffer)
+        chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+
+
+def iter_features(response):
+    """
+    Yield the GeoJSON features of a streamed (``stream=True``) response one
+    at a time, without materialising the whole body. Falls back to
+    ``response.json()`` when ijson is not installed.
+    """
+    if ijson is None:
+        yield from response.json().get("features", [])
+        return
+
+    # iter_content undoes gzip/deflate before the bytes reach the parser.
+    yield from ijson.items(_ContentReader(response), "features.item", use_float=True)
+
+
+def batched(iterable, size=INGEST_BATCH_SIZE):
+    """Yield lists of up to ``size`` items from ``iterable``."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
@@ -5,12 +5,12 @@ from google import genai
 from newsapi import NewsApiClient
 from gdacs.api import GDACSAPIReader, GDACSAPIError
 from datetime import datetime, timedelta
-import requests
 from shapely import coordinates
 from sqlalchemy.orm.session import Session
 import xmltodict
 from geopy.distance import geodesic
 import random
+from . import http_client
 
 
 def parse_usgs_geojson(properties, coords):
@@ -34,7 +34,7 @@ def fetch_gdacs_events(from_date, to_date, event_type=["EQ", "FL"]):
         f"https://www.gdacs.org/gdacsapi/api/Events/geteventlist/search"
         f"?fromDate={from_date}&toDate={to_date}&alertlevel=Green;Orange;Red&eventlist={';'.join(event_type)}"
     )
-    response = requests.get(url)
+    response = http_client.get(url)
     data = response.json()
     events = data.get("features", [])
     return events
@@ -74,14 +74,14 @@ def find_matching_gdacs_event(properties, coords):
 
 def fetch_gdacs_event_details(event_id):
     url = f"https://www.gdacs.org/gdacsapi/api/event/{event_id}"
-    response = requests.get(url)
+    response = http_client.get(url)
     data = xmltodict.parse(response.text)
     return data['gdacs']['event'] if 'gdacs' in data and 'event' in data['gdacs'] else None
 
 
 def download_open_meteo_precip(lat, lon):
     url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&past_days=3&forecast_days=3&hourly=precipitation"
-    r = requests.get(url)
+    r = http_client.get(url)
     if r.status_code != 200:
         raise Exception("Open-Meteo API request failed")
     return r.json()
@@ -136,7 +136,7 @@ def get_latest_alert_info(gdasc_id, event_type):
             "eventid": gdasc_id,
             "eventtype": event_type
         }
-        response = requests.get(url, params=params, timeout=60)
+        response = http_client.get(url, params=params, timeout=60)
         if response.status_code != 200:
             print(f"Failed to fetch data: {response.status_code}")
             return
@@ -220,7 +220,7 @@ def query_gnewsapi(query, from_date, to_date):
         "to": to_iso,
         "sortby": "relevance"
     }
-    res = requests.get(url, params=params)
+    res = http_client.get(url, params=params)
     print(f"\n📰 GNews results for: {query}")
     for article in res.json().get("articles", []):
         print(
@@ -237,7 +237,7 @@ def query_reddit(query, alert_info):
         "sort": "new",
         "limit": 5
     }
-    res = requests.get(url, headers=headers, params=params)
+    res = http_client.get(url, headers=headers, params=params)
     print(f"\n🗣️ Reddit /r/news results for: {query}")
     posts = [post["data"]
              for post in res.json().get("data", {}).get("children", [])]